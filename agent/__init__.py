@@ -1,5 +1,15 @@
 """AgentKit package exports."""
 
-from .agent import run_agent, run_agent_with_history
+from .agent import (
+    run_agent,
+    run_agent_batch,
+    run_agent_with_history,
+    stream_agent_with_history,
+)
 
-__all__ = ["run_agent", "run_agent_with_history"]
+__all__ = [
+    "run_agent",
+    "run_agent_batch",
+    "run_agent_with_history",
+    "stream_agent_with_history",
+]
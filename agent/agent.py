@@ -3,141 +3,332 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Dict, List
-
-from .prompts import AVAILABLE_TOOLS_PROMPT, SUMMARY_PROMPT, SYSTEM_PROMPT
-from .router import describe_tools, select_tool
-from .tools import TOOLS
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .prompts import (
+    AVAILABLE_TOOLS_PROMPT,
+    CHAIN_OUTPUT_PROMPT,
+    CHAIN_RESPONSE_GUIDELINES,
+    CONVERSATION_CONTEXT_PROMPT,
+    HISTORY_SUMMARY_PROMPT,
+    IDLE_RESPONSE_GUIDELINES,
+    SUMMARY_PROMPT,
+    SYSTEM_PROMPT,
+    TOOL_OUTPUT_PROMPT,
+    TOOL_RESPONSE_GUIDELINES,
+    USER_MESSAGE_PROMPT,
+)
+from .router import (
+    NO_PRIOR_CONVERSATION,
+    _try_fast_route,
+    build_routing_context,
+    describe_tools,
+    select_tool,
+)
+from .cache import TTLCache
+from .tools import TOOLS, _hybrid_search, _retrieve_context
 from .llm_client import llm_client
+from .settings import get_settings
 from .tool_chain import tool_chain
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class Message:
-    role: str
-    content: str
+# Final answers keyed by model, tool, normalised message, a hash of the tool
+# output and a hash of the last few turns. A hit skips the answer generation
+# call, which dominates a turn's latency.
+ANSWER_CACHE_SIZE = 10_000
+ANSWER_CACHE_TTL_SECONDS = 600
+ANSWER_CACHE_TURNS = 3
+_answer_cache = TTLCache(max_size=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL_SECONDS)
 
+# Number of prior turns always kept in the prompt, and the block size the
+# window start advances by once the history grows past RECENT + BLOCK.
+HISTORY_RECENT_MESSAGES = 10
+HISTORY_TRIM_BLOCK = 10
 
-async def _format_response(
-    message: str, model: str, tool_name: str, tool_output: str
-) -> str:
-    """Create the final response string sent back to the caller using LLM."""
+# Summaries of turns that fell out of the window, keyed by a fingerprint of
+# those turns. The fingerprint only changes when the window anchor moves, so
+# each summary is generated at most once per trim block.
+_HISTORY_SUMMARY_CACHE_SIZE = 256
+_history_summaries: "OrderedDict[str, str]" = OrderedDict()
+_pending_summaries: Dict[str, asyncio.Task] = {}
 
-    if tool_name == "idle":
-        # For idle responses, be more assertive about capabilities
-        prompt = f"""You are AgentKit, a proactive and helpful AI agent. The user said: "{message}"
+# The tool registry is static, so the overview is rendered once at import.
+_TOOL_OVERVIEW = AVAILABLE_TOOLS_PROMPT.format(tool_overview=describe_tools())
 
-You are designed to be decisive and take action. You have these powerful capabilities:
-- Web search: You can find current information on any topic
-- Document explanations: You can explain complex topics and architectures
-- Memory functions: You can remember and recall information
+# Static prompt prefixes (system prompt, tool overview, guidelines), one per
+# response kind, assembled once so each request only appends its own content.
+_IDLE_PREFIX = f"{SYSTEM_PROMPT}{_TOOL_OVERVIEW}{IDLE_RESPONSE_GUIDELINES}"
+_TOOL_PREFIX = f"{SYSTEM_PROMPT}{_TOOL_OVERVIEW}{TOOL_RESPONSE_GUIDELINES}"
+_CHAIN_PREFIX = f"{SYSTEM_PROMPT}{_TOOL_OVERVIEW}{CHAIN_RESPONSE_GUIDELINES}"
 
-Important guidelines:
-- Be confident and assertive in your responses
-- If you don't know something that could be searched, mention that you would search for it
-- Don't ask permission to use tools - just state what you can do
-- Be direct and actionable in your communication
-- Show enthusiasm for helping solve problems
 
-Respond naturally and confidently."""
+@dataclass
+class Message:
+    role: str
+    content: str
 
-        return await llm_client.generate_response(prompt, model)
-    else:
-        # For tool-specific responses, be confident about the results
-        prompt = f"""You are AgentKit, a confident and helpful AI agent. The user asked: "{message}"
 
-I used my {tool_name} capability and found this information: {tool_output}
+@dataclass
+class ConversationBuffer:
+    """Append-only window over prior conversation turns.
+
+    ``cache_anchor`` marks where the rendered window starts. It only moves
+    forward in whole ``HISTORY_TRIM_BLOCK`` steps, so for consecutive turns the
+    rendered history is byte-identical except for the newly appended tail and
+    provider-side prefix caches keep matching.
+    """
+
+    messages: List[Message]
+    cache_anchor: int = 0
+    # "role: content" lines for the window, formatted once per message
+    lines: List[str] = field(default_factory=list)
+    # Summary of the turns before ``cache_anchor``, when one is available
+    summary: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if not self.lines:
+            self.lines = [f"{msg.role}: {msg.content}" for msg in self.window]
+
+    @classmethod
+    def from_history(
+        cls,
+        conversation_history: List[Dict],
+        recent: int = HISTORY_RECENT_MESSAGES,
+        block: int = HISTORY_TRIM_BLOCK,
+    ) -> "ConversationBuffer":
+        messages = [
+            Message(role=msg["role"], content=msg["content"])
+            for msg in conversation_history
+            if msg.get("role") in ["user", "assistant"]
+        ]
+        overflow = len(messages) - recent - block
+        # Round up to the next block boundary so the anchor stays put for
+        # ``block`` consecutive messages.
+        anchor = -(-overflow // block) * block if overflow > 0 else 0
+        return cls(messages=messages, cache_anchor=anchor)
+
+    @property
+    def window(self) -> List[Message]:
+        return self.messages[self.cache_anchor:]
+
+    def append(self, role: str, content: str) -> None:
+        """Add a message to the tail of the window."""
+        self.messages.append(Message(role=role, content=content))
+        self.lines.append(f"{role}: {content}")
+
+    def render(self, last: Optional[int] = None) -> str:
+        """Render the windowed turns (or only the ``last`` few) verbatim."""
+        if not self.lines:
+            return NO_PRIOR_CONVERSATION
+        if last is not None:
+            return "\n".join(self.lines[-last:])
+        if self.summary:
+            return "\n".join([f"system: Summary of earlier conversation: {self.summary}", *self.lines])
+        return "\n".join(self.lines)
+
+    @property
+    def dropped(self) -> List[Message]:
+        """Messages that fell out of the window."""
+        return self.messages[:self.cache_anchor]
+
+
+def _history_summary(buffer: ConversationBuffer) -> Optional[str]:
+    """Return the summary of turns before the window, if one is ready.
+
+    Missing summaries are generated in the background so the current request
+    never waits on them; a later turn picks the result up.
+    """
+    if not buffer.cache_anchor or not llm_client.is_available():
+        return None
+
+    digest = hashlib.sha1()
+    for msg in buffer.dropped:
+        digest.update(f"{msg.role}\0{msg.content}\0".encode())
+    key = digest.hexdigest()
+
+    summary = _history_summaries.get(key)
+    if summary is not None:
+        _history_summaries.move_to_end(key)
+        return summary
+
+    if key not in _pending_summaries:
+        task = asyncio.create_task(_summarise_dropped(key, buffer.dropped))
+        _pending_summaries[key] = task
+        task.add_done_callback(lambda _: _pending_summaries.pop(key, None))
+    return None
+
+
+async def _summarise_dropped(key: str, dropped: List[Message]) -> None:
+    conversation = "\n".join(f"{msg.role}: {msg.content}" for msg in dropped)
+    try:
+        summary = await llm_client.generate_response(
+            HISTORY_SUMMARY_PROMPT.format(conversation=conversation), "gemini"
+        )
+    except Exception as e:
+        logger.warning("History summary failed: %s", e)
+        return
 
-Guidelines for your response:
-- Be assertive and confident about the information you found
-- Present the results clearly and professionally
-- Don't hedge or apologize unnecessarily
-- If the information seems incomplete, mention you can search for more details
-- Be direct and helpful
-- Show that you're actively working to provide the best possible answer
+    # Don't cache the client's fallback reply as a summary
+    if not llm_client.is_generated(summary):
+        return
 
-Provide a confident, well-formatted response based on the information gathered."""
+    _history_summaries[key] = summary.strip()
+    while len(_history_summaries) > _HISTORY_SUMMARY_CACHE_SIZE:
+        _history_summaries.popitem(last=False)
 
-        return await llm_client.generate_response(prompt, model)
+
+def _build_prompt(
+    prefix: str, conversation_context: str, message: str, tool_section: str = ""
+) -> str:
+    """Append the per-turn content to one of the static prompt prefixes.
+
+    The conversation, tool output and finally the user message follow the
+    prefix, so every turn of the same kind shares it verbatim.
+    """
+    return (
+        prefix
+        + CONVERSATION_CONTEXT_PROMPT.format(conversation_context=conversation_context)
+        + tool_section
+        + USER_MESSAGE_PROMPT.format(message=message)
+    )
 
 
-def _summarise(history: List[Message], final_answer: str) -> str:
-    conversation = "\n".join(f"{msg.role}: {msg.content}" for msg in history)
-    conversation += f"\nagent: {final_answer}"
+def _summarise(buffer: ConversationBuffer, final_answer: str) -> str:
+    conversation = f"{buffer.render()}\nagent: {final_answer}"
     return SUMMARY_PROMPT.format(conversation=conversation)
 
 
-async def run_agent_with_history(
+@dataclass
+class _PreparedTurn:
+    """Everything needed to generate and package one agent reply."""
+
+    prompt: str
+    buffer: ConversationBuffer
+    start_ns: int
+    result: Dict[str, Any]
+    # Answer cache key, or None when the answer must not be cached
+    cache_key: Optional[str] = None
+
+
+def _answer_cache_key(model: str, message: str, recent_turns: str, result: Dict[str, Any]) -> str:
+    """Hash the inputs that determine a turn's answer into a cache key."""
+    payload = json.dumps(
+        {
+            "m": model,
+            "t": result["tool_used"],
+            "q": " ".join(message.lower().split()),
+            "o": hashlib.blake2b(result["tool_output"].encode()).hexdigest(),
+            "h": hashlib.blake2b(recent_turns.encode()).hexdigest(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.blake2b(payload.encode()).hexdigest()
+
+
+async def _prepare_turn(
     message: str,
     model: str,
     conversation_history: List[Dict],
-    namespace: str = "default",
-    session_id: str = "default",
-    search_mode: str = "auto",
-) -> Dict[str, str]:
-    """Entry point used by the FastAPI app with conversation history and search mode support."""
-    import time
-    start_time = time.time()
-
-    # Convert conversation history to Message objects
-    history = []
-    for msg in conversation_history[-10:]:  # Keep last 10 messages for context
-        if msg.get("role") in ["user", "assistant"]:
-            history.append(Message(role=msg["role"], content=msg["content"]))
+    namespace: str,
+    search_mode: str,
+) -> _PreparedTurn:
+    """Route and run tools for a message, returning the final LLM prompt."""
+    start_ns = time.perf_counter_ns()
+
+    # Window prior turns on block boundaries so the prompt prefix stays stable
+    buffer = ConversationBuffer.from_history(conversation_history)
+    # Older turns are carried as a running summary instead of raw messages
+    buffer.summary = _history_summary(buffer)
+    # Unlike a plain last-five slice, the prompt context holds only prior
+    # turns. The current message and this turn's tool output have their own
+    # prompt sections, so each reaches the prompt exactly once.
+    conversation_context = buffer.render()
+
+    # Routing gets the current message separately, so its context is only the
+    # turns before it. That keeps the context identical for every opening
+    # message, which lets the router reuse earlier decisions.
+    routing_context = buffer.render(last=3)
+    answer_turns = buffer.render(last=ANSWER_CACHE_TURNS)
 
     # Add current user message
-    history.append(Message(role="user", content=message))
-
-    # Create context from recent conversation for enhanced routing
-    recent_context = "\n".join([f"{msg.role}: {msg.content}" for msg in history[-3:]])
+    buffer.append("user", message)
+
+    # Create context from recent conversation for chain detection
+    recent_context = buffer.render(last=3)
+
+    # In auto mode routing does not depend on chain detection. Messages the
+    # router can decide locally are routed right away; otherwise start the
+    # routing call now so both LLM calls run concurrently.
+    routed_tool = None
+    route_task = None
+    if search_mode not in ("web", "documents", "hybrid"):
+        routing_context = build_routing_context(routing_context)
+        routed_tool = _try_fast_route(message, routing_context)
+        if routed_tool is None:
+            route_task = asyncio.create_task(select_tool(message, routing_context))
 
-    # Check if this query could benefit from tool chaining
-    chain_steps = await tool_chain.detect_chain_opportunity(message, recent_context)
-    
-    if chain_steps:
+    try:
+        # Check if this query could benefit from tool chaining
+        chain_steps = await tool_chain.detect_chain_opportunity(message, recent_context)
         # Execute tool chain
-        chain_result = await tool_chain.execute_chain(chain_steps, namespace)
-        
+        chain_result = await tool_chain.execute_chain(chain_steps, namespace) if chain_steps else None
+    except BaseException:
+        # Don't leave the routing call running with nothing to await it
+        if route_task is not None:
+            route_task.cancel()
+        raise
+
+    if chain_result is not None:
         if chain_result.success:
+            # The single-tool route is no longer needed
+            if route_task is not None:
+                route_task.cancel()
+
             # Combine results from chained tools
-            combined_output = "\n\n".join([
+            combined_output = "\n\n".join(
                 f"**{tool}**: {result}" for tool, result in chain_result.results.items()
-            ])
+            )
             
             # Add chain execution info to history
-            history.append(Message(
-                role="tool", 
-                content=f"chain: {' → '.join(chain_result.execution_order)} | {combined_output}"
-            ))
+            buffer.append(
+                "tool",
+                f"chain: {' → '.join(chain_result.execution_order)} | {combined_output}",
+            )
             
             # Format response with chain context
-            conversation_context = "\n".join([f"{msg.role}: {msg.content}" for msg in history[-5:]])
-            final_answer = await _format_chain_response(
-                message, model, chain_result.results, chain_result.execution_order, conversation_context
+            prompt = _chain_response_prompt(
+                message, chain_result.results, chain_result.execution_order, conversation_context
             )
             
-            execution_time = time.time() - start_time
-            summary = _summarise(history, final_answer)
-            
-            return {
-                "answer": final_answer,
+            result = {
                 "tool_used": f"chain({' → '.join(chain_result.execution_order)})",
                 "tool_output": combined_output,
                 "model": model,
-                "context": AVAILABLE_TOOLS_PROMPT.format(tool_overview=describe_tools()),
-                "summary": summary,
+                "context": _TOOL_OVERVIEW,
                 "chain_execution": True,
-                "execution_time": execution_time,
                 "chain_details": {
                     "steps": len(chain_steps),
                     "tools": chain_result.execution_order,
                     "success": chain_result.success
                 }
             }
+            return _PreparedTurn(
+                prompt=prompt,
+                buffer=buffer,
+                start_ns=start_ns,
+                result=result,
+                cache_key=_answer_cache_key(model, message, answer_turns, result),
+            )
         else:
             # Chain failed, fall back to single tool
-            print(f"Tool chain failed: {chain_result.error}, falling back to single tool")
+            logger.warning("Tool chain failed: %s, falling back to single tool", chain_result.error)
 
     # Standard single tool execution with search mode override
     if search_mode == "web":
@@ -147,158 +338,223 @@ async def run_agent_with_history(
     elif search_mode == "hybrid":
         tool_name = "hybrid"
     else:
-        # Auto mode - let the router decide
-        tool_name = await select_tool(f"Current message: {message}", f"Recent conversation:\n{recent_context}")
-    
-    tool = TOOLS[tool_name]
+        # Auto mode - use the router decision made or started above
+        tool_name = routed_tool if route_task is None else await route_task
 
     # Execute single tool with error handling
     tool_output = ""
     tool_error = None
     
     try:
+        # Idle output never reaches the prompt, so don't run it at all
+        if tool_name == "idle":
+            pass
         # Handle RAG tool with namespace parameter
-        if tool_name == "rag":
-            from .tools import _retrieve_context
+        elif tool_name == "rag":
             tool_output = await _retrieve_context(message, namespace=namespace)
         # Handle hybrid tool with namespace parameter
         elif tool_name == "hybrid":
-            from .tools import _hybrid_search
             tool_output = await _hybrid_search(message, namespace=namespace)
         else:
-            tool_output = await tool.run(message)
+            tool_output = await TOOLS[tool_name].run(message)
     except Exception as e:
         tool_error = str(e)
         tool_output = f"Tool execution failed: {tool_error}"
-        print(f"Tool {tool_name} execution error: {e}")
+        logger.error("Tool %s execution error: %s", tool_name, e)
 
     if tool_name != "idle" and tool_output:
-        history.append(Message(role="tool", content=f"{tool_name}: {tool_output}"))
+        buffer.append("tool", f"{tool_name}: {tool_output}")
 
     # Include conversation context in response generation
-    conversation_context = "\n".join([f"{msg.role}: {msg.content}" for msg in history[-5:]])
-    
-    final_answer = await _format_response_with_context(
-        message, model, tool_name, tool_output, conversation_context
+    prompt = _response_prompt_with_context(
+        message, tool_name, tool_output, conversation_context
     )
-    
-    execution_time = time.time() - start_time
-    summary = _summarise(history, final_answer)
-    tool_overview = AVAILABLE_TOOLS_PROMPT.format(tool_overview=describe_tools())
 
-    return {
-        "answer": final_answer,
+    result = {
         "tool_used": tool_name,
         "tool_output": tool_output,
         "model": model,
-        "context": tool_overview,
-        "summary": summary,
+        "context": _TOOL_OVERVIEW,
         "chain_execution": False,
-        "execution_time": execution_time,
         "tool_error": tool_error
     }
+    return _PreparedTurn(
+        prompt=prompt,
+        buffer=buffer,
+        start_ns=start_ns,
+        result=result,
+        # A failed tool's answer would outlive the failure, so it isn't cached
+        cache_key=None if tool_error else _answer_cache_key(model, message, answer_turns, result),
+    )
 
 
-async def _format_chain_response(
-    message: str,
-    model: str, 
-    chain_results: Dict[str, str],
-    execution_order: List[str],
-    conversation_context: str
-) -> str:
-    """Format response when multiple tools were used in a chain."""
-    
-    # Create a summary of what each tool contributed
-    tool_contributions = []
-    for tool_name in execution_order:
-        result = chain_results.get(tool_name, "No result")
-        tool_contributions.append(f"- **{tool_name.title()}**: {result[:200]}{'...' if len(result) > 200 else ''}")
-    
-    contributions_summary = "\n".join(tool_contributions)
-    
-    prompt = f"""You are AgentKit, a powerful AI agent that just executed a sophisticated workflow. 
-
-User asked: "{message}"
+def _cached_answer(turn: _PreparedTurn) -> Optional[str]:
+    """Return the cached answer for the turn, if answer caching applies."""
+    # LLM_CACHE_ENABLED switches off answer caching along with the LLM cache
+    if turn.cache_key is None or not get_settings().llm_cache_enabled:
+        return None
+    return _answer_cache.get(turn.cache_key)
 
-Recent conversation context:
-{conversation_context}
 
-I used multiple tools in sequence to provide a comprehensive answer:
-{contributions_summary}
+def _cache_answer(turn: _PreparedTurn, final_answer: str) -> None:
+    """Cache a generated answer, skipping the client's fallback replies."""
+    if (
+        turn.cache_key is None
+        or not get_settings().llm_cache_enabled
+        or not llm_client.is_generated(final_answer)
+    ):
+        return
+    _answer_cache.set(turn.cache_key, final_answer)
 
-Your task is to synthesize these results into a coherent, valuable response:
 
-Guidelines:
-- Acknowledge the comprehensive analysis you performed
-- Synthesize information from all tools into a unified answer  
-- Highlight connections and insights across the different tool results
-- Be confident about the thoroughness of your analysis
-- Show how the multi-step approach provided better results
-- Present the information clearly and professionally
-- Reference specific findings from each tool when relevant
+def clear_answer_cache() -> None:
+    """Drop all cached answers."""
+    _answer_cache.clear()
 
-Provide a confident, well-structured response that showcases the value of the multi-tool analysis."""
 
-    return await llm_client.generate_response(prompt, model)
+def _complete_turn(turn: _PreparedTurn, final_answer: str, cache_hit: bool = False) -> Dict[str, Any]:
+    """Attach the generated answer, summary, and timing to a prepared turn."""
+    return {
+        "answer": final_answer,
+        **turn.result,
+        "cache_hit": cache_hit,
+        "summary": _summarise(turn.buffer, final_answer),
+        "execution_time": (time.perf_counter_ns() - turn.start_ns) / 1e9,
+    }
 
 
-async def _format_response_with_context(
+async def run_agent_with_history(
     message: str,
     model: str,
-    tool_name: str,
-    tool_output: str,
-    conversation_context: str,
-) -> str:
-    """Create the final response string with conversation context."""
+    conversation_history: List[Dict],
+    namespace: str = "default",
+    session_id: str = "default",
+    search_mode: str = "auto",
+) -> Dict[str, str]:
+    """Entry point used by the FastAPI app with conversation history and search mode support."""
+    turn = await _prepare_turn(message, model, conversation_history, namespace, search_mode)
+    final_answer = _cached_answer(turn)
+    if final_answer is not None:
+        return _complete_turn(turn, final_answer, cache_hit=True)
+    final_answer = await llm_client.generate_response(turn.prompt, model)
+    _cache_answer(turn, final_answer)
+    return _complete_turn(turn, final_answer)
 
-    if tool_name == "idle":
-        prompt = f"""You are AgentKit, a proactive and helpful AI agent.
 
-Recent conversation context:
-{conversation_context}
+async def stream_agent_with_history(
+    message: str,
+    model: str,
+    conversation_history: List[Dict],
+    namespace: str = "default",
+    session_id: str = "default",
+    search_mode: str = "auto",
+) -> AsyncIterator[Dict[str, Any]]:
+    """Streaming variant of ``run_agent_with_history``.
 
-Current user message: "{message}"
+    Yields ``{"type": "chunk", "content": ...}`` events as the answer is
+    generated, followed by a single ``{"type": "done", ...}`` event carrying
+    the same fields ``run_agent_with_history`` returns.
+    """
+    turn = await _prepare_turn(message, model, conversation_history, namespace, search_mode)
 
-You are designed to be decisive and take action. You have these powerful capabilities:
-- Web search: You can find current information on any topic
-- Document explanations: You can explain complex topics and architectures
-- Memory functions: You can remember and recall information
+    cached = _cached_answer(turn)
+    if cached is not None:
+        yield {"type": "chunk", "content": cached}
+        yield {"type": "done", **_complete_turn(turn, cached, cache_hit=True)}
+        return
 
-Important guidelines:
-- Be confident and assertive in your responses
-- Reference previous conversation when relevant
-- If you don't know something that could be searched, mention that you would search for it
-- Don't ask permission to use tools - just state what you can do
-- Be direct and actionable in your communication
-- Show enthusiasm for helping solve problems
+    chunks: List[str] = []
+    async for chunk in llm_client.stream_response(turn.prompt, model):
+        chunks.append(chunk)
+        yield {"type": "chunk", "content": chunk}
 
-Respond naturally and confidently, taking into account the conversation history."""
+    final_answer = "".join(chunks)
+    _cache_answer(turn, final_answer)
+    yield {"type": "done", **_complete_turn(turn, final_answer)}
 
-        return await llm_client.generate_response(prompt, model)
-    else:
-        prompt = f"""You are AgentKit, a confident and helpful AI agent.
 
-Recent conversation context:
-{conversation_context}
+def _preview(text: str, limit: int = 200) -> str:
+    """Truncate text to ``limit`` characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else f"{text[:limit]}..."
 
-Current user message: "{message}"
 
-I used my {tool_name} capability and found this information: {tool_output}
+def _chain_response_prompt(
+    message: str,
+    chain_results: Dict[str, str],
+    execution_order: List[str],
+    conversation_context: str
+) -> str:
+    """Build the response prompt when multiple tools were used in a chain."""
+    
+    # Create a summary of what each tool contributed
+    contributions_summary = "\n".join(
+        f"- **{tool_name.title()}**: {_preview(chain_results.get(tool_name, 'No result'))}"
+        for tool_name in execution_order
+    )
+    
+    return _build_prompt(
+        _CHAIN_PREFIX,
+        conversation_context,
+        message,
+        CHAIN_OUTPUT_PROMPT.format(contributions_summary=contributions_summary),
+    )
 
-Guidelines for your response:
-- Be assertive and confident about the information you found
-- Reference previous conversation when relevant to provide better context
-- Present the results clearly and professionally
-- Don't hedge or apologize unnecessarily
-- If the information seems incomplete, mention you can search for more details
-- Be direct and helpful
-- Show that you're actively working to provide the best possible answer
 
-Provide a confident, well-formatted response based on the information gathered and conversation history."""
+def _response_prompt_with_context(
+    message: str,
+    tool_name: str,
+    tool_output: str,
+    conversation_context: str,
+) -> str:
+    """Build the final response prompt with conversation context."""
 
-        return await llm_client.generate_response(prompt, model)
+    if tool_name == "idle":
+        return _build_prompt(_IDLE_PREFIX, conversation_context, message)
+    else:
+        return _build_prompt(
+            _TOOL_PREFIX,
+            conversation_context,
+            message,
+            TOOL_OUTPUT_PROMPT.format(tool_name=tool_name, tool_output=tool_output),
+        )
 
 
 async def run_agent(message: str, model: str) -> Dict[str, str]:
     """Entry point used by the FastAPI app - backwards compatibility."""
     return await run_agent_with_history(message, model, [])
+
+
+async def run_agent_batch(
+    messages: List[str],
+    model: str,
+    concurrency: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Run independent queries concurrently, returning results in input order.
+
+    At most ``concurrency`` queries are in flight at a time, defaulting to the
+    AGENT_MAX_CONCURRENCY setting so batches stay within provider rate limits.
+    A query that raises produces an error entry instead of failing the whole
+    batch.
+    """
+    if concurrency is None:
+        concurrency = get_settings().agent_max_concurrency
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run_one(message: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_agent(message, model)
+
+    results = await asyncio.gather(
+        *(_run_one(message) for message in messages), return_exceptions=True
+    )
+    return [
+        {
+            "answer": f"Agent execution failed: {result}",
+            "tool_used": "error",
+            "model": model,
+            "error": str(result),
+        }
+        if isinstance(result, Exception)
+        else result
+        for result in results
+    ]
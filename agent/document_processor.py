@@ -1,5 +1,6 @@
 """Document processing utilities for AgentKit."""
 
+import asyncio
 import io
 import os
 from typing import Dict, List, Optional, Union
@@ -12,6 +13,13 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+try:
+    import pypdfium2 as pdfium
+
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
 try:
     import docx
 
@@ -32,6 +40,15 @@ class DocumentProcessor:
         "application/json": "json",
     }
 
+    # Extraction handler per file extension; other supported types are text
+    _HANDLERS = {
+        "pdf": "_process_pdf",
+        "docx": "_process_docx",
+    }
+
+    # Text files larger than this are decoded off the event loop
+    THREADED_DECODE_THRESHOLD = 1024 * 1024
+
     @classmethod
     def is_supported(cls, content_type: str) -> bool:
         """Check if file type is supported."""
@@ -41,7 +58,7 @@ class DocumentProcessor:
     def get_missing_dependencies(cls) -> List[str]:
         """Get list of missing optional dependencies."""
         missing = []
-        if not PDF_AVAILABLE:
+        if not PDF_AVAILABLE and not PDFIUM_AVAILABLE:
             missing.append("PyPDF2")
         if not DOCX_AVAILABLE:
             missing.append("python-docx")
@@ -49,18 +66,21 @@ class DocumentProcessor:
 
     @classmethod
     async def process_file(
-        cls, content: bytes, filename: str, content_type: str
+        cls, content: Union[bytes, Path], filename: str, content_type: str
     ) -> Dict[str, Union[str, int, bool]]:
         """
         Process uploaded file and extract text content.
 
+        ``content`` is either the file bytes or the path of a stored file,
+        which is then read inside the extraction step.
+
         Returns:
             Dict with extracted text, metadata, and processing info
         """
         result = {
             "filename": filename,
             "content_type": content_type,
-            "size": len(content),
+            "size": len(content) if isinstance(content, bytes) else os.path.getsize(content),
             "text_content": "",
             "page_count": 0,
             "word_count": 0,
@@ -68,31 +88,15 @@ class DocumentProcessor:
             "error_message": None,
         }
 
-        try:
-            if content_type == "text/plain":
-                result["text_content"] = content.decode("utf-8", errors="ignore")
-                result["processing_success"] = True
-
-            elif content_type == "application/pdf" and PDF_AVAILABLE:
-                result.update(await cls._process_pdf(content))
-
-            elif (
-                content_type
-                == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                and DOCX_AVAILABLE
-            ):
-                result.update(await cls._process_docx(content))
-
-            elif content_type in ["text/markdown", "text/csv", "application/json"]:
-                result["text_content"] = content.decode("utf-8", errors="ignore")
-                result["processing_success"] = True
+        extension = cls.SUPPORTED_FORMATS.get(content_type)
+        if extension is None:
+            result["error_message"] = f"Unsupported file type: {content_type}"
+            return result
+        handler = cls._HANDLERS.get(extension, "_process_text")
 
-            else:
-                result["error_message"] = f"Unsupported file type: {content_type}"
-
-            # Calculate word count if text was extracted
-            if result["text_content"]:
-                result["word_count"] = len(result["text_content"].split())
+        try:
+            # Handlers count words alongside extraction, in the same worker thread
+            result.update(await getattr(cls, handler)(content))
 
         except Exception as e:
             result["error_message"] = f"Error processing file: {str(e)}"
@@ -100,26 +104,66 @@ class DocumentProcessor:
         return result
 
     @classmethod
-    async def _process_pdf(cls, content: bytes) -> Dict[str, Union[str, int, bool]]:
+    async def _process_text(cls, content: Union[bytes, Path]) -> Dict[str, Union[str, int, bool]]:
+        """Decode a UTF-8 text file, in a worker thread for large or on-disk files."""
+        if not isinstance(content, bytes) or len(content) > cls.THREADED_DECODE_THRESHOLD:
+            return await asyncio.to_thread(cls._extract_text, content)
+        return cls._extract_text(content)
+
+    @staticmethod
+    def _extract_text(content: Union[bytes, Path]) -> Dict[str, Union[str, int, bool]]:
+        """Decode a UTF-8 text file and count its words synchronously."""
+        if isinstance(content, bytes):
+            text_content = content.decode("utf-8", errors="ignore")
+        else:
+            text_content = Path(content).read_text(encoding="utf-8", errors="ignore")
+        return {
+            "text_content": text_content,
+            "word_count": len(text_content.split()),
+            "processing_success": True,
+        }
+
+    @classmethod
+    async def _process_pdf(cls, content: Union[bytes, Path]) -> Dict[str, Union[str, int, bool]]:
         """Extract text from PDF file."""
-        if not PDF_AVAILABLE:
+        if not PDF_AVAILABLE and not PDFIUM_AVAILABLE:
             return {
                 "text_content": "",
                 "processing_success": False,
                 "error_message": "PyPDF2 not installed. Run: pip install PyPDF2",
             }
 
-        try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+        # Parsing is blocking, so run it in a worker thread
+        return await asyncio.to_thread(cls._extract_pdf, content)
 
-            text_content = ""
-            for page in pdf_reader.pages:
-                text_content += page.extract_text() + "\n\n"
+    @staticmethod
+    def _extract_pdf(content: Union[bytes, Path]) -> Dict[str, Union[str, int, bool]]:
+        """Parse a PDF and extract its text synchronously.
+
+        Uses PDFium when pypdfium2 is installed, as it is much faster than
+        PyPDF2's pure-Python text extraction. Files PDFium rejects are retried
+        with PyPDF2 when it is installed.
+        """
+        try:
+            parts = None
+            if PDFIUM_AVAILABLE:
+                try:
+                    parts, page_count = DocumentProcessor._pdfium_pages(content)
+                except pdfium.PdfiumError:
+                    if not PDF_AVAILABLE:
+                        raise
+            if parts is None:
+                pdf_reader = PyPDF2.PdfReader(
+                    io.BytesIO(content) if isinstance(content, bytes) else content
+                )
+                parts = [page.extract_text() or "" for page in pdf_reader.pages]
+                page_count = len(parts)
 
+            text_content = "\n\n".join(parts).strip()
             return {
-                "text_content": text_content.strip(),
-                "page_count": len(pdf_reader.pages),
+                "text_content": text_content,
+                "page_count": page_count,
+                "word_count": len(text_content.split()),
                 "processing_success": True,
             }
 
@@ -130,8 +174,25 @@ class DocumentProcessor:
                 "error_message": f"PDF processing error: {str(e)}",
             }
 
+    @staticmethod
+    def _pdfium_pages(content: Union[bytes, Path]) -> tuple[List[str], int]:
+        """Extract per-page text with PDFium, returning the texts and page count."""
+        pdf = pdfium.PdfDocument(content if isinstance(content, bytes) else str(content))
+        try:
+            parts = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    parts.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                    page.close()
+            return parts, len(pdf)
+        finally:
+            pdf.close()
+
     @classmethod
-    async def _process_docx(cls, content: bytes) -> Dict[str, Union[str, int, bool]]:
+    async def _process_docx(cls, content: Union[bytes, Path]) -> Dict[str, Union[str, int, bool]]:
         """Extract text from DOCX file."""
         if not DOCX_AVAILABLE:
             return {
@@ -140,15 +201,22 @@ class DocumentProcessor:
                 "error_message": "python-docx not installed. Run: pip install python-docx",
             }
 
+        return await asyncio.to_thread(cls._extract_docx, content)
+
+    @staticmethod
+    def _extract_docx(content: Union[bytes, Path]) -> Dict[str, Union[str, int, bool]]:
+        """Parse a DOCX file and extract its text synchronously."""
         try:
-            docx_file = io.BytesIO(content)
+            docx_file = io.BytesIO(content) if isinstance(content, bytes) else str(content)
             doc = docx.Document(docx_file)
 
-            text_content = ""
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
+            text_content = "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
 
-            return {"text_content": text_content.strip(), "processing_success": True}
+            return {
+                "text_content": text_content,
+                "word_count": len(text_content.split()),
+                "processing_success": True,
+            }
 
         except Exception as e:
             return {
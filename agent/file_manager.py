@@ -1,41 +1,125 @@
 """File storage and management for AgentKit."""
 
-import os
-import uuid
-import hashlib
+import asyncio
 import json
-from typing import Dict, List, Optional
-from pathlib import Path
-from datetime import datetime
+import os
+import secrets
 import shutil
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Union
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Metadata fields, in index table column order
+METADATA_COLUMNS = (
+    "file_id",
+    "original_filename",
+    "stored_filename",
+    "content_type",
+    "file_size",
+    "upload_timestamp",
+    "user_id",
+    "file_path",
+    "metadata_path",
+)
 
 
 class FileManager:
     """Manages file storage, retrieval, and metadata."""
 
+    # Storage directories already created in this process
+    _prepared_dirs: Set[Path] = set()
+
     def __init__(self, storage_dir: str = "uploads"):
         self.storage_dir = Path(storage_dir)
         self.metadata_dir = self.storage_dir / "metadata"
         self.files_dir = self.storage_dir / "files"
 
         # Create directories if they don't exist
-        self.storage_dir.mkdir(exist_ok=True)
-        self.metadata_dir.mkdir(exist_ok=True)
-        self.files_dir.mkdir(exist_ok=True)
+        if self.storage_dir not in self._prepared_dirs:
+            self.storage_dir.mkdir(exist_ok=True)
+            self.metadata_dir.mkdir(exist_ok=True)
+            self.files_dir.mkdir(exist_ok=True)
+            self._prepared_dirs.add(self.storage_dir)
+
+        # Metadata index, so listings and cleanup don't read every JSON file
+        self.db = sqlite3.connect(
+            str(self.storage_dir / "index.db"), check_same_thread=False
+        )
+        self.db.row_factory = sqlite3.Row
+        self._db_lock = threading.Lock()
+        self._init_index()
+
+    def _init_index(self):
+        """Create the metadata index and import any existing JSON metadata."""
+        with self._db_lock, self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    original_filename TEXT NOT NULL,
+                    stored_filename TEXT NOT NULL,
+                    content_type TEXT,
+                    file_size INTEGER NOT NULL,
+                    upload_timestamp TEXT NOT NULL,
+                    user_id TEXT,
+                    file_path TEXT NOT NULL,
+                    metadata_path TEXT
+                )
+            """)
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_files_user_id ON files(user_id)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_files_upload_timestamp "
+                "ON files(upload_timestamp DESC)"
+            )
+            indexed = self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+        if not indexed:
+            self._import_metadata_files()
+
+    def _import_metadata_files(self):
+        """Index metadata JSON files written before the index existed."""
+        rows = []
+        for metadata_file in self.metadata_dir.glob("*.json"):
+            try:
+                with open(metadata_file, "r") as f:
+                    metadata = json.load(f)
+                rows.append(tuple(metadata.get(column) for column in METADATA_COLUMNS))
+            except (json.JSONDecodeError, FileNotFoundError):
+                continue
+
+        if rows:
+            self._write_rows(rows)
+
+    def _write_rows(self, rows: List[tuple]):
+        """Insert or update metadata rows in the index."""
+        placeholders = ", ".join("?" for _ in METADATA_COLUMNS)
+        with self._db_lock, self.db:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO files ({', '.join(METADATA_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Run a read query against the index."""
+        with self._db_lock:
+            return self.db.execute(sql, params).fetchall()
 
     def generate_file_id(self, content: bytes, filename: str) -> str:
         """
         Generate cryptographically secure file ID.
         Uses secrets module for unpredictable, non-enumerable IDs.
         """
-        import secrets
         # Use cryptographically secure random token
         # 32 bytes = 256 bits of entropy, URL-safe base64 encoded
         return secrets.token_urlsafe(32)
 
     async def store_file(
         self,
-        content: bytes,
+        content: Union[bytes, Path],
         filename: str,
         content_type: str,
         user_id: Optional[str] = None,
@@ -43,6 +127,9 @@ class FileManager:
         """
         Store file permanently and return file metadata.
 
+        ``content`` is either the file bytes or the path of a spooled upload,
+        which is moved into storage rather than read into memory.
+
         Returns:
             Dict with file_id, storage_path, metadata_path, etc.
         """
@@ -55,38 +142,42 @@ class FileManager:
         file_path = self.files_dir / stored_filename
         metadata_path = self.metadata_dir / f"{file_id}.json"
 
-        # Store the actual file
-        with open(file_path, "wb") as f:
-            f.write(content)
-
         # Create metadata
         metadata = {
             "file_id": file_id,
             "original_filename": filename,
             "stored_filename": stored_filename,
             "content_type": content_type,
-            "file_size": len(content),
+            "file_size": (
+                len(content) if isinstance(content, bytes) else os.path.getsize(content)
+            ),
             "upload_timestamp": datetime.now().isoformat(),
             "user_id": user_id,
             "file_path": str(file_path),
             "metadata_path": str(metadata_path),
         }
 
-        # Store metadata
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f, indent=2)
+        # Disk writes are blocking, so keep them off the event loop
+        await asyncio.to_thread(self._write_file, content, metadata)
 
         return metadata
 
-    def get_file_metadata(self, file_id: str) -> Optional[Dict]:
-        """Retrieve file metadata by file ID."""
-        metadata_path = self.metadata_dir / f"{file_id}.json"
+    def _write_file(self, content: Union[bytes, Path], metadata: Dict) -> None:
+        """Write the file, its JSON sidecar, and its index row."""
+        if isinstance(content, bytes):
+            with open(metadata["file_path"], "wb") as f:
+                f.write(content)
+        else:
+            shutil.move(content, metadata["file_path"])
 
-        if not metadata_path.exists():
-            return None
+        with open(metadata["metadata_path"], "w") as f:
+            json.dump(metadata, f, indent=2)
+        self._write_rows([tuple(metadata[column] for column in METADATA_COLUMNS)])
 
-        with open(metadata_path, "r") as f:
-            return json.load(f)
+    def get_file_metadata(self, file_id: str) -> Optional[Dict]:
+        """Retrieve file metadata by file ID."""
+        rows = self._query("SELECT * FROM files WHERE file_id = ?", (file_id,))
+        return dict(rows[0]) if rows else None
 
     def get_file_content(self, file_id: str) -> Optional[bytes]:
         """Retrieve file content by file ID."""
@@ -98,31 +189,32 @@ class FileManager:
         if not file_path.exists():
             return None
 
-        with open(file_path, "rb") as f:
-            return f.read()
+        return file_path.read_bytes()
+
+    async def get_file_content_async(self, file_id: str) -> Optional[bytes]:
+        """Retrieve file content by file ID without blocking the event loop."""
+        return await asyncio.to_thread(self.get_file_content, file_id)
 
     def list_user_files(self, user_id: Optional[str] = None) -> List[Dict]:
         """List all files for a user (or all files if user_id is None)."""
-        files = []
-
-        for metadata_file in self.metadata_dir.glob("*.json"):
-            try:
-                with open(metadata_file, "r") as f:
-                    metadata = json.load(f)
-
-                # Filter by user if specified
-                if user_id is None or metadata.get("user_id") == user_id:
-                    files.append(metadata)
-            except (json.JSONDecodeError, FileNotFoundError):
-                continue
-
-        # Sort by upload timestamp (newest first)
-        files.sort(key=lambda x: x["upload_timestamp"], reverse=True)
-        return files
-
-    def delete_file(self, file_id: str) -> bool:
-        """Delete a file and its metadata."""
-        metadata = self.get_file_metadata(file_id)
+        # Newest first
+        if user_id is None:
+            rows = self._query("SELECT * FROM files ORDER BY upload_timestamp DESC")
+        else:
+            rows = self._query(
+                "SELECT * FROM files WHERE user_id = ? ORDER BY upload_timestamp DESC",
+                (user_id,),
+            )
+        return [dict(row) for row in rows]
+
+    def delete_file(self, file_id: str, metadata: Optional[Dict] = None) -> bool:
+        """Delete a file and its metadata.
+
+        Callers that already hold the file's metadata can pass it to skip the
+        lookup.
+        """
+        if metadata is None:
+            metadata = self.get_file_metadata(file_id)
         if not metadata:
             return False
 
@@ -137,40 +229,34 @@ class FileManager:
             if metadata_path.exists():
                 metadata_path.unlink()
 
+            with self._db_lock, self.db:
+                self.db.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
             return True
         except Exception:
             return False
 
     def cleanup_old_files(self, days_old: int = 30) -> int:
         """Delete files older than specified days. Returns count of deleted files."""
-        from datetime import timedelta
-
         cutoff_date = datetime.now() - timedelta(days=days_old)
         deleted_count = 0
 
-        for metadata_file in self.metadata_dir.glob("*.json"):
-            try:
-                with open(metadata_file, "r") as f:
-                    metadata = json.load(f)
-
-                upload_date = datetime.fromisoformat(metadata["upload_timestamp"])
-
-                if upload_date < cutoff_date:
-                    if self.delete_file(metadata["file_id"]):
-                        deleted_count += 1
-            except (json.JSONDecodeError, FileNotFoundError, ValueError):
-                continue
+        # ISO timestamps sort chronologically, so the index can filter them
+        rows = self._query(
+            "SELECT * FROM files WHERE upload_timestamp < ?",
+            (cutoff_date.isoformat(),),
+        )
+        for row in rows:
+            if self.delete_file(row["file_id"], metadata=dict(row)):
+                deleted_count += 1
 
         return deleted_count
 
     def get_storage_stats(self) -> Dict[str, int]:
         """Get storage statistics."""
-        total_files = len(list(self.metadata_dir.glob("*.json")))
-        total_size = 0
-
-        for file_path in self.files_dir.iterdir():
-            if file_path.is_file():
-                total_size += file_path.stat().st_size
+        total_files, total_size = self._query(
+            "SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM files"
+        )[0]
 
         return {
             "total_files": total_files,
@@ -2,91 +2,223 @@
 
 from __future__ import annotations
 
-import os
-from typing import Optional
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
 
-from dotenv import load_dotenv
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
-# Load environment variables from .env file
-load_dotenv()
+from .cache import TTLCache
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Connection pool for the shared async HTTP client behind genai.Client. Every
+# LLM call reuses these keep-alive connections instead of new TLS handshakes.
+# httpx drops idle connections after 5s by default, shorter than the usual gap
+# between chat turns, so keep them open for longer.
+HTTP_POOL_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=50,
+    keepalive_expiry=75.0,
+)
+
+# Default generation settings, built once. Callers needing different sampling
+# (e.g. short deterministic classifications) pass per-call overrides.
+GENERATION_CONFIG = types.GenerateContentConfig(
+    temperature=0.7,
+    max_output_tokens=4000,
+)
+
+# Rate limits and server errors are usually transient, so generation retries
+# them with exponential backoff before falling back
+GENERATION_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.25
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Models offered when the API can't be asked, and until discovery finishes
+FALLBACK_MODELS = ("gemini-2.0-flash-001", "gemini-1.5-flash", "gemini-1.5-pro")
+
+# Model discovery runs in the background on first use, gives up after a few
+# seconds, and is cached on disk for a day so restarts skip it.
+MODEL_DISCOVERY_TIMEOUT = 2.0
+MODELS_CACHE_PATH = Path.home() / ".cache" / "agentkit" / "models.json"
+MODELS_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+def _read_models_cache() -> Optional[list[str]]:
+    """Return the cached model list if it is younger than the TTL."""
+    try:
+        cached = json.loads(MODELS_CACHE_PATH.read_text())
+        if time.time() - cached["fetched_at"] < MODELS_CACHE_TTL_SECONDS:
+            return list(cached["models"]) or None
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_models_cache(models: list[str]) -> None:
+    try:
+        MODELS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        MODELS_CACHE_PATH.write_text(
+            json.dumps({"fetched_at": time.time(), "models": models})
+        )
+    except OSError as e:
+        logger.warning("Could not cache model list: %s", e)
+
+
+# Gemini clients by API key. LLMClient instances share these so they reuse one
+# connection pool instead of each opening their own.
+_genai_clients: Dict[str, genai.Client] = {}
+_genai_clients_lock = threading.Lock()
+
+
+def _release_client(client: genai.Client) -> None:
+    """Forget ``client`` so the next lookup for its key builds a fresh one."""
+    with _genai_clients_lock:
+        for api_key, cached in list(_genai_clients.items()):
+            if cached is client:
+                del _genai_clients[api_key]
+
+
+def _get_or_create_client(api_key: str) -> genai.Client:
+    """Return the process-wide Gemini client for ``api_key``."""
+    with _genai_clients_lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    async_client_args={"limits": HTTP_POOL_LIMITS}
+                ),
+            )
+            _genai_clients[api_key] = client
+        return client
+
+
+def _generation_config(
+    temperature: Optional[float], max_output_tokens: Optional[int]
+) -> types.GenerateContentConfig:
+    """Return GENERATION_CONFIG with any per-call overrides applied."""
+    overrides = {}
+    if temperature is not None:
+        overrides["temperature"] = temperature
+    if max_output_tokens is not None:
+        overrides["max_output_tokens"] = max_output_tokens
+    if not overrides:
+        return GENERATION_CONFIG
+    return GENERATION_CONFIG.model_copy(update=overrides)
+
+
+def _response_cache_key(
+    model: str, prompt: str, temperature: Optional[float], max_output_tokens: Optional[int]
+) -> str:
+    """Hash the generation inputs, so identical requests share one cache entry."""
+    payload = json.dumps(
+        {"m": model, "p": prompt, "t": temperature, "mx": max_output_tokens},
+        sort_keys=True,
+    )
+    return hashlib.blake2b(payload.encode()).hexdigest()
 
 
 class LLMClient:
     """Client for interacting with language models."""
 
     def __init__(self):
-        self.genai_client: Optional[genai.Client] = None
-        self.available_models: list[str] = []
-        self._initialize_clients()
+        self._genai_client: Optional[genai.Client] = None
+        # Set when the client must be (re)built on next access: initially, so
+        # settings are read on first use rather than at import, and after close()
+        self._client_pending = True
+        self.available_models: list[str] = list(FALLBACK_MODELS)
+        self._models_loaded = False
+        self._models_task: Optional[asyncio.Future] = None
+        # In-flight generations keyed by model, prompt and sampling settings so
+        # concurrent identical requests share one provider call
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.response_cache = TTLCache()
+
+    @property
+    def genai_client(self) -> Optional[genai.Client]:
+        """The Gemini client, built on first use and again after ``close()``."""
+        if self._client_pending:
+            self._client_pending = False
+            self._initialize_clients()
+        return self._genai_client
+
+    @genai_client.setter
+    def genai_client(self, client: Optional[genai.Client]) -> None:
+        self._client_pending = False
+        self._genai_client = client
 
     def _initialize_clients(self):
-        """Initialize available LLM clients based on environment variables."""
-        google_api_key = os.getenv("GOOGLE_API_KEY")
+        """Initialize available LLM clients based on environment variables.
+
+        Model discovery is deferred to the first request (see
+        ``_ensure_models_loaded``) so construction never waits on the network.
+        """
+        google_api_key = get_settings().google_api_key
         if google_api_key:
             try:
-                self.genai_client = genai.Client(api_key=google_api_key)
-                # Load available models
-                self._load_available_models()
+                self.genai_client = _get_or_create_client(google_api_key)
             except Exception as e:
-                print(f"Warning: Failed to initialize Gemini client: {e}")
-                # Set fallback models even if client init fails
-                self._set_fallback_models()
+                logger.warning("Failed to initialize Gemini client: %s", e)
         else:
-            print("No Google API key found, using fallback models")
-            # Set fallback models when no API key
-            self._set_fallback_models()
-    
-    def _set_fallback_models(self):
-        """Set fallback models when API is not available."""
-        self.available_models = [
-            "gemini-2.0-flash-001",
-            "gemini-1.5-flash", 
-            "gemini-1.5-pro",
-        ]
-
-    def _load_available_models(self):
-        """Load available text generation models from Google GenAI."""
-        if not self.genai_client:
-            return
+            logger.info("No Google API key found, using fallback models")
 
-        try:
-            # Get list of available models
-            models = list(self.genai_client.models.list())
+    def _schedule_model_discovery(self) -> None:
+        """Start loading the model list in the background, once."""
+        if self.genai_client and self._models_task is None:
+            self._models_task = asyncio.ensure_future(self._ensure_models_loaded())
 
-            # Filter for text generation models
-            text_models = []
-            for model in models:
-                try:
-                    model_name = getattr(model, "name", None)
-                    if model_name:
-                        # Extract just the model name (remove "models/" prefix if present)
-                        clean_name = (
-                            model_name.replace("models/", "")
-                            if model_name.startswith("models/")
-                            else model_name
-                        )
+    async def _ensure_models_loaded(self) -> None:
+        """Replace the fallback model list with the models the API offers.
 
-                        # Include Gemini models (which support text generation)
-                        if "gemini" in clean_name.lower():
-                            text_models.append(clean_name)
-                except Exception:
-                    continue  # Skip models that cause errors
+        Uses the on-disk list when it is fresh, otherwise asks the API with a
+        short timeout. Failures keep the fallback models.
+        """
+        if self._models_loaded or not self.genai_client:
+            return
+        self._models_loaded = True
 
-            self.available_models = (
-                sorted(text_models)
-                if text_models
-                else ["gemini-2.0-flash-001", "gemini-1.5-flash", "gemini-1.5-pro"]
-            )
-            print(
-                f"Found {len(self.available_models)} available text models: {', '.join(self.available_models[:3])}{'...' if len(self.available_models) > 3 else ''}"
+        models = _read_models_cache()
+        if models is None:
+            try:
+                models = await asyncio.wait_for(
+                    self._load_available_models(), MODEL_DISCOVERY_TIMEOUT
+                )
+            except Exception as e:
+                logger.warning("Could not load available models: %s", e)
+                return
+            if models:
+                _write_models_cache(models)
+        if models:
+            self.available_models = models
+            logger.info(
+                "Found %d available text models: %s%s",
+                len(models), ", ".join(models[:3]), "..." if len(models) > 3 else "",
             )
 
-        except Exception as e:
-            print(f"Warning: Could not load available models: {e}")
-            # Use fallback models
-            self._set_fallback_models()
+    async def _load_available_models(self) -> list[str]:
+        """Load available text generation models from Google GenAI."""
+        text_models = []
+        async for model in await self.genai_client.aio.models.list():
+            model_name = getattr(model, "name", None)
+            if not model_name:
+                continue
+            # Extract just the model name (remove "models/" prefix if present)
+            clean_name = model_name.removeprefix("models/")
+            # Include Gemini models (which support text generation)
+            if "gemini" in clean_name.lower():
+                text_models.append(clean_name)
+        return sorted(text_models)
 
     def get_available_models(self) -> list[str]:
         """Get list of available text generation models."""
@@ -102,40 +234,158 @@ class LLMClient:
             return self.available_models[0]
         return "gemini-2.0-flash-001"  # Fallback
 
-    async def generate_response(self, prompt: str, model: str = "gemini") -> str:
-        """Generate a response using the specified model."""
+    def _resolve_model(self, model: str) -> str:
+        """Map a requested model name onto an available one."""
+        if model == "gemini":
+            return self.get_default_model()
+        elif model in self.available_models:
+            return model
+        # If model not found, use default
+        return self.get_default_model()
+
+    async def generate_response(
+        self,
+        prompt: str,
+        model: str = "gemini",
+        cache: bool = False,
+        *,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        """Generate a response using the specified model.
+
+        ``temperature`` and ``max_output_tokens`` override GENERATION_CONFIG
+        for this call. Concurrent calls with the same model, prompt and
+        settings are coalesced onto a single provider request. Responses are
+        cached when generation is deterministic (temperature 0) or when the
+        caller passes ``cache=True``.
+        """
+        self._schedule_model_discovery()
+        config = _generation_config(temperature, max_output_tokens)
+        cache_key = None
+        if (cache or config.temperature == 0) and get_settings().llm_cache_enabled:
+            cache_key = _response_cache_key(
+                model, prompt, config.temperature, config.max_output_tokens
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        key = (model, prompt, config.temperature, config.max_output_tokens)
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._generate(prompt, model, config))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget_inflight(key, done))
+        # Shield so one caller's cancellation doesn't cancel the shared call
+        response = await asyncio.shield(task)
+        if cache_key is not None and self.is_generated(response):
+            self.response_cache.set(cache_key, response)
+        return response
+
+    def _forget_inflight(self, key: Tuple, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _generate(
+        self, prompt: str, model: str, config: types.GenerateContentConfig
+    ) -> str:
+        """Issue a generation request, retrying transient provider errors."""
         if self.genai_client:
-            try:
-                # Determine which model to use
-                if model == "gemini":
-                    model_name = self.get_default_model()
-                elif model in self.available_models:
-                    model_name = model
-                else:
-                    # If model not found, use default
-                    model_name = self.get_default_model()
-
-                response = await self.genai_client.aio.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=0.7,
-                        max_output_tokens=4000,
-                    ),
-                )
-                return response.text if response.text else "No response generated"
-            except Exception as e:
-                print(f"Error calling Gemini API with model {model}: {e}")
-                return self._fallback_response(prompt)
+            for attempt in range(GENERATION_ATTEMPTS):
+                try:
+                    response = await self.genai_client.aio.models.generate_content(
+                        model=self._resolve_model(model),
+                        contents=prompt,
+                        config=config,
+                    )
+                    return response.text if response.text else "No response generated"
+                except errors.APIError as e:
+                    if e.code in RETRYABLE_STATUS_CODES and attempt + 1 < GENERATION_ATTEMPTS:
+                        logger.warning(
+                            "Gemini API returned %s for model %s, retrying", e.code, model
+                        )
+                        # Full jitter keeps concurrent retries from arriving together
+                        await asyncio.sleep(random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt))
+                        continue
+                    logger.error("Error calling Gemini API with model %s: %s", model, e)
+                    return self._fallback_response(prompt)
+                except Exception as e:
+                    logger.error("Error calling Gemini API with model %s: %s", model, e)
+                    return self._fallback_response(prompt)
 
         # Fallback for when API is not available
         return self._fallback_response(prompt)
 
+    async def stream_response(
+        self, prompt: str, model: str = "gemini"
+    ) -> AsyncIterator[str]:
+        """Stream a response as text chunks while the model generates it."""
+        if not self.genai_client:
+            yield self._fallback_response(prompt)
+            return
+        self._schedule_model_discovery()
+
+        produced = False
+        try:
+            stream = await self.genai_client.aio.models.generate_content_stream(
+                model=self._resolve_model(model),
+                contents=prompt,
+                config=GENERATION_CONFIG,
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    produced = True
+                    yield chunk.text
+        except Exception as e:
+            logger.error("Error streaming from Gemini API with model %s: %s", model, e)
+            if not produced:
+                yield self._fallback_response(prompt)
+            return
+
+        if not produced:
+            yield "No response generated"
+
+    async def prewarm(self) -> None:
+        """Open a pooled connection to the Gemini API before the first request.
+
+        Makes one cheap request through the async client so DNS, TCP, and TLS
+        setup happen ahead of the first generation.
+        """
+        if not self.genai_client:
+            return
+        try:
+            await self.genai_client.aio.models.list(config={"page_size": 1})
+        except Exception as e:
+            logger.warning("Could not prewarm Gemini connection: %s", e)
+            return
+        self._schedule_model_discovery()
+
     async def close(self):
-        """Clean up any open connections."""
-        # Note: The google-genai client handles connection cleanup automatically
-        # This method is provided for future extensibility
-        pass
+        """Close the pooled HTTP connections held by the Gemini client.
+
+        The closed client is dropped from the shared registry, and a new one
+        is built the next time the client is used (e.g. by a later lifespan).
+        """
+        client = self._genai_client
+        if client is None:
+            return
+        _release_client(client)
+        self._genai_client = None
+        self._client_pending = True
+        await client.aio.aclose()
+
+    def is_generated(self, response: str) -> bool:
+        """Whether ``response`` came from the model rather than a fallback.
+
+        The fallback reply is the same for every prompt, so only the text is
+        compared.
+        """
+        return (
+            self.genai_client is not None
+            and response != "No response generated"
+            and response != self._fallback_response("")
+        )
 
     def _fallback_response(self, prompt: str) -> str:
         """Provide a fallback response when LLM is not available."""
@@ -155,5 +405,6 @@ class LLMClient:
         return False
 
 
-# Global LLM client instance
+# Global LLM client instance. Import this rather than constructing LLMClient:
+# each instance keeps its own response cache and runs its own model discovery.
 llm_client = LLMClient()
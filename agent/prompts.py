@@ -12,9 +12,211 @@ SYSTEM_PROMPT = dedent(
 
 SUMMARY_PROMPT = "Conversation summary: {conversation}"
 
+HISTORY_SUMMARY_PROMPT = dedent(
+    """
+    Summarize the following earlier part of a conversation between a user and
+    AgentKit in a few sentences. Keep names, facts, decisions and open
+    questions; drop greetings and filler. Return only the summary.
+
+    {conversation}
+    """
+)
+
 AVAILABLE_TOOLS_PROMPT = dedent(
     """
     Available tools:
     {tool_overview}
     """
 )
+
+# Response guidelines. These are static and sit directly after the system
+# prompt and tool overview so they form part of the cacheable prefix.
+IDLE_RESPONSE_GUIDELINES = dedent(
+    """
+    Be proactive and helpful. You are designed to be decisive and take action. You have these powerful capabilities:
+    - Web search: You can find current information on any topic
+    - Document explanations: You can explain complex topics and architectures
+    - Memory functions: You can remember and recall information
+
+    Important guidelines:
+    - Be confident and assertive in your responses
+    - Reference previous conversation when relevant
+    - If you don't know something that could be searched, mention that you would search for it
+    - Don't ask permission to use tools - just state what you can do
+    - Be direct and actionable in your communication
+    - Show enthusiasm for helping solve problems
+
+    Respond naturally and confidently, taking into account the conversation history.
+    """
+)
+
+TOOL_RESPONSE_GUIDELINES = dedent(
+    """
+    Guidelines for your response:
+    - Be assertive and confident about the information you found
+    - Reference previous conversation when relevant to provide better context
+    - Present the results clearly and professionally
+    - Don't hedge or apologize unnecessarily
+    - If the information seems incomplete, mention you can search for more details
+    - Be direct and helpful
+    - Show that you're actively working to provide the best possible answer
+
+    Provide a confident, well-formatted response based on the information gathered and conversation history.
+    """
+)
+
+CHAIN_RESPONSE_GUIDELINES = dedent(
+    """
+    You just executed a sophisticated workflow using multiple tools in sequence.
+    Your task is to synthesize these results into a coherent, valuable response:
+
+    Guidelines:
+    - Acknowledge the comprehensive analysis you performed
+    - Synthesize information from all tools into a unified answer
+    - Highlight connections and insights across the different tool results
+    - Be confident about the thoroughness of your analysis
+    - Show how the multi-step approach provided better results
+    - Present the information clearly and professionally
+    - Reference specific findings from each tool when relevant
+
+    Provide a confident, well-structured response that showcases the value of the multi-tool analysis.
+    """
+)
+
+# Per-turn content, always appended after the static prefix.
+CONVERSATION_CONTEXT_PROMPT = dedent(
+    """
+    Recent conversation context:
+    {conversation_context}
+    """
+)
+
+TOOL_OUTPUT_PROMPT = dedent(
+    """
+    I used my {tool_name} capability and found this information: {tool_output}
+    """
+)
+
+CHAIN_OUTPUT_PROMPT = dedent(
+    """
+    I used multiple tools in sequence to provide a comprehensive answer:
+    {contributions_summary}
+    """
+)
+
+USER_MESSAGE_PROMPT = dedent(
+    """
+    Current user message: "{message}"
+    """
+)
+
+# Tool routing, chain detection and query rewriting prompts.
+# The fixed instructions come first so every routing call shares the same
+# prompt prefix; only the conversation and message at the end vary.
+ROUTING_PROMPT = dedent(
+    """
+    Route the user message to one tool: web, rag, memory, or idle.
+
+    TOOLS:
+    {tool_descriptions}
+
+    RULES:
+    - web: factual questions needing current or external information, news, research
+    - rag: questions about AgentKit's architecture, features, setup, or documentation
+    - memory: explicit requests to remember, store, or recall personal information
+    - idle: greetings, thanks, and casual conversation that needs no tool
+    - Use the conversation context; prioritize user intent over literal keywords
+
+    CONVERSATION:
+    {conversation_context}
+
+    MESSAGE: "{message}"
+    TOOL:
+    """
+)
+
+ROUTING_BATCH_PROMPT = dedent(
+    """
+    You are AgentKit's intelligent routing system. Select the optimal tool for each of the independent user queries below.
+
+    AVAILABLE TOOLS:
+    {tool_descriptions}
+
+    ROUTING RULES:
+    - web: factual questions needing current or external information, news, research
+    - rag: questions about AgentKit's architecture, features, setup, or documentation
+    - memory: explicit requests to remember, store, or recall personal information
+    - idle: greetings, thanks, and casual conversation that needs no tool
+    - Use each query's own conversation context; prioritize user intent over literal keywords
+
+    {queries}
+
+    Respond with exactly {count} lines, one per query in order, each containing ONLY the tool name.
+    """
+)
+
+ROUTING_BATCH_ITEM_PROMPT = dedent(
+    """
+    QUERY {index}: "{message}"
+    CONTEXT {index}:
+    {conversation_context}
+    """
+)
+
+# Static instructions first and the query last, so every detection call shares
+# the same prompt prefix.
+CHAIN_DETECTION_PROMPT = dedent(
+    """
+    You are AgentKit's workflow analyzer. Analyze the user query at the end to determine if it EXPLICITLY needs multiple tools working together.
+
+    AVAILABLE TOOLS:
+    - web: Search for current information and facts
+    - rag: Retrieve information from uploaded documents
+    - memory: Store or recall personal information
+    - idle: General conversation
+
+    IMPORTANT: Only suggest chaining when the user EXPLICITLY requests multiple actions. Simple queries should use SINGLE tool.
+
+    CHAIN PATTERNS TO DETECT (be conservative):
+
+    1. **RESEARCH + MEMORY**: User explicitly asks to find AND remember/save information
+       Example: "Find Tesla stock price and remember it" → Chain: web → memory
+       NOT: "Find Tesla stock price" → SINGLE
+
+    2. **RECALL + SEARCH**: User explicitly references previous info AND asks for new search
+       Example: "Based on what I told you about my project, find related tools" → Chain: memory → web
+       NOT: "Find project tools" → SINGLE
+
+    3. **COMPARE DOCUMENTS + WEB**: User asks to compare internal docs with external info
+       Example: "Compare our budget document with current market rates" → Chain: rag → web
+       NOT: "What are current market rates" → SINGLE
+
+    4. **CONVERSATIONAL**: Simple greetings, thanks, questions without multiple actions
+       Examples: "hello", "thanks", "what is X?" → SINGLE
+
+    Analyze the query and respond with ONE of:
+    - SINGLE: Query needs only one tool (most common)
+    - SEQUENTIAL: Query explicitly needs multiple tools in sequence
+    - PARALLEL: Query explicitly needs multiple tools simultaneously
+    - CONDITIONAL: Next tool explicitly depends on first tool's result
+
+    Be CONSERVATIVE - when in doubt, choose SINGLE. Only chain when user explicitly requests multiple actions.
+
+    CONVERSATION CONTEXT:
+    {conversation_context}
+
+    USER QUERY: "{message}"
+    """
+)
+
+QUERY_ENHANCEMENT_PROMPT = dedent(
+    """
+    Given this user query, extract the key search terms and concepts that would be most effective for semantic document search. Remove filler words but preserve important context.
+
+    User Query: "{query}"
+
+    Return only the enhanced search query without any explanation. Keep it concise and focused on the core concepts. If the query is already optimal, return it unchanged.
+
+    Enhanced Query:
+    """
+)
@@ -2,11 +2,393 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import math
 import re
+import sqlite3
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, Any
+from itertools import islice
+from pathlib import Path
+from typing import FrozenSet, List, Optional, Dict, Any, Tuple
 from .tools import TOOLS
 from .llm_client import llm_client
+from .prompts import ROUTING_BATCH_ITEM_PROMPT, ROUTING_BATCH_PROMPT, ROUTING_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# The tool registry is fixed at import time, so its routing description is too
+_TOOL_DESCRIPTIONS = "\n".join(
+    f"- {tool.name}: {tool.description}" for tool in TOOLS.values()
+)
+
+# ROUTING_PROMPT with the tool list already filled in; only the per-message
+# fields are formatted on each call
+_ROUTING_TEMPLATE = ROUTING_PROMPT.replace(
+    "{tool_descriptions}", _TOOL_DESCRIPTIONS.replace("{", "{{").replace("}", "}}")
+)
+
+# Routing decisions keyed by (normalised message, conversation context). A
+# miss falls back to a near-duplicate search over messages that share the same
+# context, comparing character trigram sketches. Only the most recently used
+# decisions are searched, so a miss costs a bounded scan.
+_ROUTING_CACHE_SIZE = 1024
+_ROUTING_SIMILARITY_THRESHOLD = 0.95
+_ROUTING_SIMILARITY_SCAN = 64
+# Sketches whose sizes differ by more than this ratio can't reach the threshold
+_ROUTING_MIN_SIZE_RATIO = _ROUTING_SIMILARITY_THRESHOLD ** 2
+_routing_cache: "OrderedDict[Tuple[str, str], Tuple[str, FrozenSet[str]]]" = OrderedDict()
+
+
+def _normalise_message(message: str) -> str:
+    """Lower-case a message and collapse its whitespace."""
+    return re.sub(r"\s+", " ", message.lower().strip())
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    """Character trigram sketch used for near-duplicate matching."""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _cached_route(key: Tuple[str, str], grams: FrozenSet[str]) -> Optional[str]:
+    """Return the cached tool for an identical or near-identical routing query."""
+    entry = _routing_cache.get(key)
+    if entry is not None:
+        _routing_cache.move_to_end(key)
+        return entry[0]
+
+    context = key[1]
+    recent = islice(reversed(_routing_cache.items()), _ROUTING_SIMILARITY_SCAN)
+    for cached_key, (tool, cached_grams) in recent:
+        if cached_key[1] != context:
+            continue
+        sizes = sorted((len(grams), len(cached_grams)))
+        if sizes[0] < _ROUTING_MIN_SIZE_RATIO * sizes[1]:
+            continue
+        # Cosine similarity of the binary trigram vectors
+        overlap = len(grams & cached_grams)
+        if overlap / math.sqrt(sizes[0] * sizes[1]) >= _ROUTING_SIMILARITY_THRESHOLD:
+            _routing_cache.move_to_end(cached_key)
+            return tool
+    return None
+
+
+def _cache_route(key: Tuple[str, str], grams: FrozenSet[str], tool: str) -> None:
+    """Remember a routing decision, evicting the least recently used one."""
+    _routing_cache[key] = (tool, grams)
+    _routing_cache.move_to_end(key)
+    if len(_routing_cache) > _ROUTING_CACHE_SIZE:
+        _routing_cache.popitem(last=False)
+    if _routing_store is not None:
+        _store_route(key, tool)
+
+
+def clear_routing_cache():
+    """Drop all cached routing decisions."""
+    _routing_cache.clear()
+    _pending_routes.clear()
+    if _routing_store is not None:
+        with _routing_store:
+            _routing_store.execute("DELETE FROM routes")
+
+
+# Optional SQLite store that keeps routing decisions and metrics across
+# restarts. Decisions are buffered and written in batches, and the remainder
+# is flushed along with the metrics when the store is closed.
+_routing_store: Optional[sqlite3.Connection] = None
+_ROUTING_STORE_BATCH = 64
+# (message, context) -> (tool, updated_at) for decisions not yet written
+_pending_routes: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+# Rendered history for a conversation with no earlier turns
+NO_PRIOR_CONVERSATION = "No prior conversation"
+
+# Seed decisions for frequent openers so a fresh cache starts warm. They are
+# keyed by the routing context of an opening message.
+_COMMON_ROUTES = (
+    ("what's the latest news", "web"),
+    ("what's the weather today", "web"),
+    ("what can you do", "idle"),
+    ("what did i tell you earlier", "memory"),
+    ("how do i upload documents", "rag"),
+)
+
+
+def build_routing_context(recent_turns: str) -> str:
+    """Wrap the rendered recent turns as the context routing decisions are keyed by."""
+    return f"Recent conversation:\n{recent_turns}"
+
+
+def _store_route(key: Tuple[str, str], tool: str) -> None:
+    """Buffer a decision for the store, writing the buffer once it fills."""
+    _pending_routes[key] = (tool, time.time())
+    if len(_pending_routes) >= _ROUTING_STORE_BATCH:
+        _flush_routes()
+
+
+def _flush_routes() -> None:
+    """Write the buffered decisions to the store in one transaction."""
+    if not _pending_routes:
+        return
+    with _routing_store:
+        _routing_store.executemany(
+            "INSERT OR REPLACE INTO routes (message, context, tool, updated_at) VALUES (?, ?, ?, ?)",
+            [(message, context, tool, updated_at)
+             for (message, context), (tool, updated_at) in _pending_routes.items()],
+        )
+    _pending_routes.clear()
+
+
+def open_routing_store(path: Path) -> None:
+    """Persist routing decisions and metrics in the SQLite file at ``path``.
+
+    Loads the most recent decisions into the routing cache and restores the
+    saved metrics, then seeds the cache with common routes it doesn't have.
+    """
+    global _routing_store
+    close_routing_store()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    store = sqlite3.connect(str(path), check_same_thread=False)
+    with store:
+        store.execute(
+            """
+            CREATE TABLE IF NOT EXISTS routes (
+                message TEXT NOT NULL,
+                context TEXT NOT NULL,
+                tool TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (message, context)
+            )
+            """
+        )
+        store.execute(
+            "CREATE TABLE IF NOT EXISTS metrics (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+
+    rows = store.execute(
+        "SELECT message, context, tool FROM routes ORDER BY updated_at DESC LIMIT ?",
+        (_ROUTING_CACHE_SIZE,),
+    ).fetchall()
+    for message, context, tool in reversed(rows):
+        if tool in TOOLS:
+            _cache_route((message, context), _trigrams(message), tool)
+
+    _routing_counts.update(dict(store.execute("SELECT name, value FROM metrics")))
+
+    _routing_store = store
+    preload_common_routes()
+
+
+def close_routing_store() -> None:
+    """Save buffered decisions and the routing metrics, then close the store."""
+    global _routing_store
+    if _routing_store is None:
+        return
+    _flush_routes()
+    with _routing_store:
+        _routing_store.execute("DELETE FROM metrics")
+        _routing_store.executemany(
+            "INSERT INTO metrics (name, value) VALUES (?, ?)", _routing_counts.items()
+        )
+    _routing_store.close()
+    _routing_store = None
+
+
+def preload_common_routes() -> None:
+    """Add the curated common routes to the cache where missing."""
+    context = build_routing_context(NO_PRIOR_CONVERSATION)
+    for message, tool in _COMMON_ROUTES:
+        key = (_normalise_message(message), context)
+        if key not in _routing_cache:
+            _cache_route(key, _trigrams(key[0]), tool)
+
+
+# Messages made up only of these words are small talk, which always routes to
+# idle, so they are classified locally without an LLM call. Explicit memory
+# commands and questions that name AgentKit are likewise routed locally.
+_SMALL_TALK_WORDS = frozenset({
+    "hi", "hello", "hey", "yo", "hiya", "howdy", "greetings",
+    "thanks", "thank", "you", "thx", "ty", "cheers", "much", "so", "a", "lot",
+    "bye", "goodbye", "later", "see", "ya",
+    "ok", "okay", "cool", "great", "nice", "awesome", "perfect",
+    "good", "morning", "afternoon", "evening", "night", "there", "again",
+})
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+_MEMORY_COMMANDS = frozenset({"remember", "recall"})
+
+
+def _local_route(message: str, analysis: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Classify messages whose tool is certain without asking the LLM."""
+    words = _WORD_RE.findall(message.lower())
+    if not words:
+        return None
+    if len(words) <= 6 and _SMALL_TALK_WORDS.issuperset(words):
+        return "idle"
+
+    if analysis is None:
+        analysis = _analyze_message_context(message)
+    if analysis["memory_intent"] and words[0] in _MEMORY_COMMANDS:
+        return "memory"
+    if analysis["about_agentkit"] and "agentkit" in words:
+        return "rag"
+    return None
+
+
+# Routing answers are a single tool name, so routing calls sample
+# deterministically and stop after a handful of tokens (per query when batched)
+ROUTING_TEMPERATURE = 0.0
+ROUTING_MAX_OUTPUT_TOKENS = 16
+
+# Routing calls arriving within this many seconds of each other share one LLM
+# request, up to ROUTING_MAX_BATCH queries per request
+ROUTING_BATCH_WINDOW = 0.01
+ROUTING_MAX_BATCH = 16
+
+
+@dataclass
+class _RoutingRequest:
+    prompt: str
+    message: str
+    conversation_context: str
+    future: asyncio.Future
+
+
+class _RoutingBatcher:
+    """Coalesce concurrent routing prompts into a single LLM call.
+
+    A request that arrives alone is sent with the regular routing prompt.
+    Concurrent requests are classified together, falling back to one call per
+    request when the combined reply can't be matched up with them.
+    """
+
+    def __init__(self, window: float = ROUTING_BATCH_WINDOW, max_batch: int = ROUTING_MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[_RoutingRequest] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def route(self, prompt: str, message: str, conversation_context: str) -> str:
+        """Queue a routing prompt and return the raw LLM answer for it."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Anything queued on a previous event loop can never be answered
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+
+        request = _RoutingRequest(prompt, message, conversation_context, loop.create_future())
+        self._pending.append(request)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await request.future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[_RoutingRequest]) -> None:
+        if len(batch) == 1:
+            await self._route_single(batch[0])
+            return
+
+        queries = "\n".join(
+            ROUTING_BATCH_ITEM_PROMPT.format(
+                index=index,
+                message=request.message,
+                conversation_context=request.conversation_context or NO_PRIOR_CONVERSATION,
+            )
+            for index, request in enumerate(batch, 1)
+        )
+        prompt = ROUTING_BATCH_PROMPT.format(
+            tool_descriptions=_TOOL_DESCRIPTIONS, queries=queries, count=len(batch)
+        )
+        try:
+            response = await llm_client.generate_response(
+                prompt,
+                "gemini",
+                temperature=ROUTING_TEMPERATURE,
+                max_output_tokens=ROUTING_MAX_OUTPUT_TOKENS * len(batch),
+            )
+            labels = _parse_batch_labels(response, len(batch))
+        except Exception as e:
+            logger.warning("Error in batched LLM routing: %s", e)
+            labels = None
+
+        if labels is None:
+            await asyncio.gather(*(self._route_single(request) for request in batch))
+            return
+        for request, label in zip(batch, labels):
+            if not request.future.done():
+                request.future.set_result(label)
+
+    async def _route_single(self, request: _RoutingRequest) -> None:
+        try:
+            response = await llm_client.generate_response(
+                request.prompt,
+                "gemini",
+                cache=True,
+                temperature=ROUTING_TEMPERATURE,
+                max_output_tokens=ROUTING_MAX_OUTPUT_TOKENS,
+            )
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(response)
+
+
+def _parse_batch_labels(response: str, count: int) -> Optional[List[str]]:
+    """Read one tool name per line from a batched routing reply."""
+    labels = []
+    for line in response.strip().splitlines():
+        words = re.findall(r"[a-z]+", line.lower())
+        if words:
+            labels.append(words[-1])
+    if len(labels) != count or any(label not in TOOLS for label in labels):
+        return None
+    return labels
+
+
+_routing_batcher = _RoutingBatcher()
+
+
+def _try_fast_route(
+    message: str, conversation_context: str = "", analysis: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
+    """Route without the LLM when a local rule or the routing cache decides.
+
+    Synchronous so callers can skip creating a routing task when it succeeds.
+    Returns None when the LLM has to be asked.
+    """
+    if analysis is None:
+        analysis = _analyze_message_context(message, conversation_context)
+
+    local_tool = _local_route(message, analysis)
+    if local_tool is not None:
+        _log_routing_decision(message, local_tool, analysis, "local")
+        return local_tool
+
+    # Reuse the decision for a message already routed in the same context
+    normalised = _normalise_message(message)
+    cached_tool = _cached_route((normalised, conversation_context), _trigrams(normalised))
+    if cached_tool is not None:
+        _log_routing_decision(message, cached_tool, analysis, "cache")
+        return cached_tool
+    return None
 
 
 async def select_tool(message: str, conversation_context: str = "") -> str:
@@ -14,73 +396,30 @@ async def select_tool(message: str, conversation_context: str = "") -> str:
     
     # Analyze message complexity and context
     analysis = _analyze_message_context(message, conversation_context)
+
+    fast_tool = _try_fast_route(message, conversation_context, analysis)
+    if fast_tool is not None:
+        return fast_tool
+
+    normalised = _normalise_message(message)
+    cache_key = (normalised, conversation_context)
+    grams = _trigrams(normalised)
     
-    # Create enhanced prompt for the LLM
-    tool_descriptions = "\n".join(
-        [f"- {name}: {tool.description}" for name, tool in TOOLS.items()]
+    # Compact routing prompt; the fixed instructions form a shared prefix
+    routing_prompt = _ROUTING_TEMPLATE.format(
+        message=message,
+        conversation_context=conversation_context if conversation_context else NO_PRIOR_CONVERSATION,
     )
 
-    # Enhanced routing prompt with context analysis
-    routing_prompt = f"""You are AgentKit's intelligent routing system. Your job is to analyze user queries and conversation context to select the optimal tool for the best user experience.
-
-AVAILABLE TOOLS:
-{tool_descriptions}
-
-CURRENT USER QUERY: "{message}"
-
-CONVERSATION CONTEXT ANALYSIS:
-- Message complexity: {analysis['complexity']}
-- Contains factual questions: {analysis['needs_facts']}
-- References AgentKit system: {analysis['about_agentkit']}  
-- Memory-related intent: {analysis['memory_intent']}
-- Conversational tone: {analysis['conversational']}
-
-CONVERSATION CONTEXT:
-{conversation_context if conversation_context else "No prior conversation"}
-
-ENHANCED ROUTING RULES:
-1. **Web Tool** - Use for:
-   - Factual questions requiring current/real-time information
-   - "Who/what/when/where/why/how" questions about external topics
-   - Current events, news, market data, scientific facts
-   - Company information, person profiles, technical specifications
-   - Research queries needing up-to-date information
-   - When conversation context suggests need for external knowledge
-
-2. **RAG Tool** - Use for:
-   - Questions about AgentKit architecture, features, or setup
-   - Documentation requests about this system
-   - "How does AgentKit work" type questions
-   - Technical implementation details of AgentKit
-
-3. **Memory Tool** - Use for:
-   - Explicit requests to remember/store information
-   - Requests to recall previously mentioned information
-   - "Remember when I said...", "What did I tell you about..."
-   - Managing personal preferences or stored data
-
-4. **Idle Tool** - Use for:
-   - Simple greetings, thanks, acknowledgments
-   - General conversational responses without tool needs
-   - Casual conversation that doesn't require external information
-   - When no other tool is clearly needed
-
-CONTEXT-AWARE DECISION MAKING:
-- Consider conversation flow and previous tool usage
-- Prioritize user intent over literal keywords
-- If uncertain between tools, favor the one that provides more value
-- Consider if the user might benefit from chained tool usage
-
-Respond with ONLY the tool name: web, rag, memory, or idle"""
-
     try:
         # Use LLM to intelligently select the tool
-        llm_response = await llm_client.generate_response(routing_prompt, "gemini")
+        llm_response = await _routing_batcher.route(routing_prompt, message, conversation_context)
         selected_tool = llm_response.strip().lower()
         
         # Validate and log the selection
         if selected_tool in TOOLS:
             _log_routing_decision(message, selected_tool, analysis, "llm")
+            _cache_route(cache_key, grams, selected_tool)
             return selected_tool
         else:
             # Enhanced fallback with context
@@ -89,39 +428,45 @@ Respond with ONLY the tool name: web, rag, memory, or idle"""
             return fallback_tool
 
     except Exception as e:
-        print(f"Error in LLM routing: {e}")
+        logger.warning("Error in LLM routing: %s", e)
         fallback_tool = _enhanced_fallback_routing(message, conversation_context, analysis)
         _log_routing_decision(message, fallback_tool, analysis, "error_fallback")
         return fallback_tool
 
 
+# Message analysis signals. Keywords are matched against whole words; the few
+# multi-word cues are matched as phrases.
+_FACTUAL_RE = re.compile(
+    r"\b(?:who|what|when|where|why|how|tell me about|explain|describe"
+    r"|latest|current|recent|today|price|cost|value)\s+"
+)
+_AGENTKIT_KEYWORDS = frozenset({"agentkit", "architecture", "setup", "documentation"})
+_AGENTKIT_PHRASES = ("how does this work",)
+_MEMORY_KEYWORDS = frozenset({
+    "remember", "remembered", "recall", "store", "stored", "save", "saved",
+    "said", "told", "mentioned",
+})
+_CONVERSATIONAL_KEYWORDS = frozenset({"hello", "hi", "thanks", "goodbye", "bye"})
+_CONVERSATIONAL_PHRASES = ("thank you",)
+
+
 def _analyze_message_context(message: str, conversation_context: str = "") -> Dict[str, Any]:
     """Analyze message and context for better routing decisions."""
     lowered = message.lower()
+    words = message.split()
+    tokens = set(_WORD_RE.findall(lowered))
     
     # Analyze message complexity
-    complexity = "complex" if len(message.split()) > 10 or "?" in message else "simple"
-    
-    # Check for factual question patterns
-    factual_patterns = [
-        r'\b(who|what|when|where|why|how)\s+',
-        r'\b(tell me about|explain|describe)\s+',
-        r'\b(latest|current|recent|today)\s+',
-        r'\b(price|cost|value)\s+',
-    ]
-    needs_facts = any(re.search(pattern, lowered) for pattern in factual_patterns)
+    complexity = "complex" if len(words) > 10 or "?" in message else "simple"
     
-    # Check for AgentKit-specific queries
-    agentkit_keywords = ["agentkit", "architecture", "setup", "documentation", "how does this work"]
-    about_agentkit = any(keyword in lowered for keyword in agentkit_keywords)
-    
-    # Check for memory intent
-    memory_keywords = ["remember", "recall", "store", "save", "said", "told", "mentioned"]
-    memory_intent = any(keyword in lowered for keyword in memory_keywords)
-    
-    # Check conversational tone
-    conversational_patterns = ["hello", "hi", "thanks", "thank you", "goodbye", "bye"]
-    conversational = any(pattern in lowered for pattern in conversational_patterns)
+    needs_facts = _FACTUAL_RE.search(lowered) is not None
+    about_agentkit = not _AGENTKIT_KEYWORDS.isdisjoint(tokens) or any(
+        phrase in lowered for phrase in _AGENTKIT_PHRASES
+    )
+    memory_intent = not _MEMORY_KEYWORDS.isdisjoint(tokens)
+    conversational = not _CONVERSATIONAL_KEYWORDS.isdisjoint(tokens) or any(
+        phrase in lowered for phrase in _CONVERSATIONAL_PHRASES
+    )
     
     return {
         "complexity": complexity,
@@ -130,10 +475,27 @@ def _analyze_message_context(message: str, conversation_context: str = "") -> Di
         "memory_intent": memory_intent,
         "conversational": conversational,
         "has_context": bool(conversation_context.strip()),
-        "word_count": len(message.split())
+        "word_count": len(words)
     }
 
 
+# Final fallback keywords in priority order. All keywords are compiled into
+# one alternation and mapped back to their tool, so a message is scanned once
+# and the highest-priority tool found wins.
+_FALLBACK_KEYWORDS = (
+    ("web", ("search", "find", "who", "what", "when", "where", "news", "latest")),
+    ("rag", ("architecture", "setup", "explain agentkit", "how does agentkit")),
+    ("memory", ("remember", "recall", "store", "memory", "said")),
+)
+_FALLBACK_KEYWORD_TOOLS = {
+    keyword: tool for tool, keywords in _FALLBACK_KEYWORDS for keyword in keywords
+}
+_FALLBACK_PRIORITY = {tool: rank for rank, (tool, _) in enumerate(_FALLBACK_KEYWORDS)}
+_FALLBACK_KEYWORD_RE = re.compile(
+    "|".join(map(re.escape, sorted(_FALLBACK_KEYWORD_TOOLS, key=len, reverse=True)))
+)
+
+
 def _enhanced_fallback_routing(message: str, conversation_context: str, analysis: Dict[str, Any]) -> str:
     """Enhanced fallback routing with context awareness."""
     lowered = message.lower()
@@ -149,49 +511,61 @@ def _enhanced_fallback_routing(message: str, conversation_context: str, analysis
         return "idle"
     
     # Traditional keyword matching as final fallback
-    if any(word in lowered for word in ["search", "find", "who", "what", "when", "where", "news", "latest"]):
-        return "web"
-    elif any(word in lowered for word in ["architecture", "setup", "explain agentkit", "how does agentkit"]):
-        return "rag"
-    elif any(word in lowered for word in ["remember", "recall", "store", "memory", "said"]):
-        return "memory"
-    else:
-        return "idle"
+    best_tool = None
+    for match in _FALLBACK_KEYWORD_RE.finditer(lowered):
+        tool = _FALLBACK_KEYWORD_TOOLS[match.group()]
+        if best_tool is None or _FALLBACK_PRIORITY[tool] < _FALLBACK_PRIORITY[best_tool]:
+            best_tool = tool
+            if _FALLBACK_PRIORITY[tool] == 0:
+                break
+    return best_tool or "idle"
 
 
-# Storage for routing metrics and logs
-_routing_metrics = {
-    "total_routes": 0,
-    "tool_usage": {"web": 0, "rag": 0, "memory": 0, "idle": 0},
-    "routing_methods": {"llm": 0, "fallback": 0, "error_fallback": 0},
-    "last_reset": datetime.now().isoformat()
-}
+# Routing counters keyed by flat tags ("total_routes", "tool_usage.web",
+# "routing_methods.llm"); get_routing_metrics() regroups them on demand.
+_ROUTED_TOOLS = ("web", "rag", "memory", "idle")
+_ROUTING_METHODS = ("llm", "local", "cache", "fallback", "error_fallback")
+_routing_counts: Counter = Counter()
+_metrics_reset_at = datetime.now().isoformat()
 
 
 def _log_routing_decision(message: str, selected_tool: str, analysis: Dict[str, Any], method: str):
     """Log routing decisions for monitoring and improvement."""
-    _routing_metrics["total_routes"] += 1
-    _routing_metrics["tool_usage"][selected_tool] += 1
-    _routing_metrics["routing_methods"][method] += 1
+    _routing_counts.update(("total_routes", f"tool_usage.{selected_tool}", f"routing_methods.{method}"))
     
-    # In production, this could write to a proper logging system
-    print(f"[ROUTING] Tool: {selected_tool}, Method: {method}, Analysis: {analysis['complexity']}")
+    logger.debug(
+        "[ROUTING] Tool: %s, Method: %s, Analysis: %s",
+        selected_tool, method, analysis["complexity"],
+    )
 
 
 def get_routing_metrics() -> Dict[str, Any]:
     """Get current routing metrics for monitoring."""
-    return _routing_metrics.copy()
+    groups = {
+        "tool_usage": dict.fromkeys(_ROUTED_TOOLS, 0),
+        "routing_methods": dict.fromkeys(_ROUTING_METHODS, 0),
+    }
+    for name, count in _routing_counts.items():
+        group, _, field = name.partition(".")
+        if group in groups:
+            groups[group][field] = count
+
+    total = _routing_counts["total_routes"]
+    return {
+        "total_routes": total,
+        **groups,
+        "last_reset": _metrics_reset_at,
+        "local_route_rate": groups["routing_methods"]["local"] / total if total else 0.0,
+    }
 
 
 def reset_routing_metrics():
     """Reset routing metrics (useful for testing)."""
-    global _routing_metrics
-    _routing_metrics = {
-        "total_routes": 0,
-        "tool_usage": {"web": 0, "rag": 0, "memory": 0, "idle": 0},
-        "routing_methods": {"llm": 0, "fallback": 0, "error_fallback": 0},
-        "last_reset": datetime.now().isoformat()
-    }
+    global _metrics_reset_at
+    _routing_counts.clear()
+    _metrics_reset_at = datetime.now().isoformat()
+
+
 def _fallback_keyword_routing(message: str) -> str:
     """Legacy fallback keyword-based routing when LLM routing fails."""
     return _enhanced_fallback_routing(message, "", _analyze_message_context(message, ""))
@@ -200,5 +574,4 @@ def _fallback_keyword_routing(message: str) -> str:
 def describe_tools() -> str:
     """Return a human readable list of available tools."""
 
-    lines = [f"- {tool.name}: {tool.description}" for tool in TOOLS.values()]
-    return "\n".join(lines)
+    return _TOOL_DESCRIPTIONS
@@ -0,0 +1,50 @@
+"""Environment-driven settings for the agent package."""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Provider keys and tuning knobs read from the environment."""
+
+    google_api_key: Optional[str] = None
+    tavily_api_key: Optional[str] = None
+    llm_cache_enabled: bool = True
+    agent_max_concurrency: int = 8
+
+
+def _positive_int(name: str, default: int) -> int:
+    """Read a positive integer variable, falling back to ``default`` if invalid."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        logger.warning("%s must be a positive integer, got %r; using %d", name, raw, default)
+        return default
+    return value
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load ``.env`` and read the settings once per process."""
+    load_dotenv()
+    return Settings(
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        tavily_api_key=os.getenv("TAVILY_API_KEY"),
+        llm_cache_enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false",
+        agent_max_concurrency=_positive_int("AGENT_MAX_CONCURRENCY", Settings.agent_max_concurrency),
+    )
@@ -3,12 +3,33 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
+from graphlib import CycleError, TopologicalSorter
 
 from .tools import TOOLS, Tool
 from .llm_client import llm_client
+from .prompts import CHAIN_DETECTION_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+# Chain detection answers by message and context, so repeated and trivially
+# re-worded messages skip the LLM. Only recognised labels are cached.
+CHAIN_DETECTION_CACHE_SIZE = 4096
+_CHAIN_LABELS = ("single", "sequential", "parallel", "conditional")
+
+# _parse_chain_response only builds a chain for messages containing one of
+# these cues, and never for small talk, so other messages skip the LLM call.
+_SIMPLE_MESSAGE_RE = re.compile(r"\b(?:hello|hi|thanks|thank you|goodbye|bye)\b", re.I)
+_CHAIN_HINT_RE = re.compile(
+    "remember|save|store|recall|based on|from earlier|compare|versus|both|also", re.I
+)
 
 
 class ChainStrategy(Enum):
@@ -37,62 +58,85 @@ class ChainResult:
     error: Optional[str] = None
 
 
+def _research_and_remember(message: str) -> List[ChainStep]:
+    return [
+        ChainStep(tool_name="web", query=message),
+        ChainStep(tool_name="memory", query=f"Remember: {message}", depends_on=["web"]),
+    ]
+
+
+def _recall_and_search(message: str) -> List[ChainStep]:
+    return [
+        ChainStep(tool_name="memory", query=f"Recall context for: {message}"),
+        ChainStep(tool_name="web", query=message, depends_on=["memory"]),
+    ]
+
+
+def _compare_documents(message: str) -> List[ChainStep]:
+    return [
+        ChainStep(tool_name="rag", query=message),
+        ChainStep(tool_name="web", query=message, depends_on=["rag"]),
+    ]
+
+
+# (tools the LLM response must name, explicit intent in the message, steps)
+#
+# The first rule whose tools and intent both match decides the chain. The
+# original if/elif chain stopped at the first tool match, so its recall branch
+# (the same tools as the remember branch) could never run, and a response
+# naming rag, web and memory could not produce the compare chain. Here a
+# recall message gets the recall chain, a compare message gets the compare
+# chain whenever rag and web are named, and remember still wins when both
+# intents appear. Greetings are matched as whole words, so "this" or "which"
+# no longer count as "hi".
+_CHAIN_RULES = (
+    (("web", "memory"), re.compile("remember|save|store", re.I), _research_and_remember),
+    (("memory", "web"), re.compile("recall|based on|from earlier", re.I), _recall_and_search),
+    (("rag", "web"), re.compile("compare|versus|both|also", re.I), _compare_documents),
+)
+
+
 class ToolChain:
     """Manages execution of tool chains for complex workflows."""
     
     def __init__(self):
         self.chains: Dict[str, List[ChainStep]] = {}
         self.execution_metrics: Dict[str, Any] = {}
+        self._detection_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    def clear_detection_cache(self) -> None:
+        """Drop all cached chain detection answers."""
+        self._detection_cache.clear()
     
     async def detect_chain_opportunity(self, message: str, conversation_context: str = "") -> Optional[List[ChainStep]]:
         """Detect if a query could benefit from tool chaining."""
+        if _CHAIN_HINT_RE.search(message) is None or _SIMPLE_MESSAGE_RE.search(message):
+            return None
+
+        cache_key = (re.sub(r"\s+", " ", message.lower().strip()), conversation_context)
+        cached = self._detection_cache.get(cache_key)
+        if cached is not None:
+            self._detection_cache.move_to_end(cache_key)
+            return self._parse_chain_response(cached, message)
         
         # Enhanced prompt for chain detection
-        chain_detection_prompt = f"""You are AgentKit's workflow analyzer. Analyze this user query to determine if it EXPLICITLY needs multiple tools working together.
-
-USER QUERY: "{message}"
-
-CONVERSATION CONTEXT:
-{conversation_context if conversation_context else "No prior context"}
-
-AVAILABLE TOOLS:
-- web: Search for current information and facts
-- rag: Retrieve information from uploaded documents  
-- memory: Store or recall personal information
-- idle: General conversation
-
-IMPORTANT: Only suggest chaining when the user EXPLICITLY requests multiple actions. Simple queries should use SINGLE tool.
-
-CHAIN PATTERNS TO DETECT (be conservative):
-
-1. **RESEARCH + MEMORY**: User explicitly asks to find AND remember/save information
-   Example: "Find Tesla stock price and remember it" → Chain: web → memory
-   NOT: "Find Tesla stock price" → SINGLE
-
-2. **RECALL + SEARCH**: User explicitly references previous info AND asks for new search
-   Example: "Based on what I told you about my project, find related tools" → Chain: memory → web
-   NOT: "Find project tools" → SINGLE
-
-3. **COMPARE DOCUMENTS + WEB**: User asks to compare internal docs with external info
-   Example: "Compare our budget document with current market rates" → Chain: rag → web
-   NOT: "What are current market rates" → SINGLE
-
-4. **CONVERSATIONAL**: Simple greetings, thanks, questions without multiple actions
-   Examples: "hello", "thanks", "what is X?" → SINGLE
-
-Analyze the query and respond with ONE of:
-- SINGLE: Query needs only one tool (most common)
-- SEQUENTIAL: Query explicitly needs multiple tools in sequence
-- PARALLEL: Query explicitly needs multiple tools simultaneously
-- CONDITIONAL: Next tool explicitly depends on first tool's result
-
-Be CONSERVATIVE - when in doubt, choose SINGLE. Only chain when user explicitly requests multiple actions."""
+        chain_detection_prompt = CHAIN_DETECTION_PROMPT.format(
+            message=message,
+            conversation_context=conversation_context if conversation_context else "No prior context",
+        )
 
         try:
-            response = await llm_client.generate_response(chain_detection_prompt, "gemini")
+            # The answer is a single label, so sample deterministically
+            response = await llm_client.generate_response(
+                chain_detection_prompt, "gemini", temperature=0.0, max_output_tokens=16
+            )
+            if response.strip().lower().startswith(_CHAIN_LABELS):
+                self._detection_cache[cache_key] = response
+                if len(self._detection_cache) > CHAIN_DETECTION_CACHE_SIZE:
+                    self._detection_cache.popitem(last=False)
             return self._parse_chain_response(response, message)
         except Exception as e:
-            print(f"Error in chain detection: {e}")
+            logger.warning("Error in chain detection: %s", e)
             return None
     
     def _parse_chain_response(self, response: str, original_message: str) -> Optional[List[ChainStep]]:
@@ -103,66 +147,75 @@ Be CONSERVATIVE - when in doubt, choose SINGLE. Only chain when user explicitly
             return None
         
         # Check if this is a simple greeting or conversational message
-        simple_patterns = ["hello", "hi", "thanks", "thank you", "goodbye", "bye"]
-        if any(pattern in original_message.lower() for pattern in simple_patterns):
+        if _SIMPLE_MESSAGE_RE.search(original_message):
             return None
             
-        # Simple pattern matching for common chains
-        if "web" in response and "memory" in response:
-            # Only create chain if there's clear intent for both search AND memory
-            if any(word in original_message.lower() for word in ["remember", "save", "store"]):
-                return [
-                    ChainStep(tool_name="web", query=original_message),
-                    ChainStep(tool_name="memory", query=f"Remember: {original_message}", depends_on=["web"])
-                ]
-        elif "memory" in response and "web" in response:
-            # Only create chain if there's clear recall + search intent
-            if any(word in original_message.lower() for word in ["recall", "based on", "from earlier"]):
-                return [
-                    ChainStep(tool_name="memory", query=f"Recall context for: {original_message}"),
-                    ChainStep(tool_name="web", query=original_message, depends_on=["memory"])
-                ]
-        elif "rag" in response and "web" in response:
-            # Only create chain for explicit comparisons or complex queries
-            if any(word in original_message.lower() for word in ["compare", "versus", "both", "also"]):
-                return [
-                    ChainStep(tool_name="rag", query=original_message),
-                    ChainStep(tool_name="web", query=original_message, depends_on=["rag"])
-                ]
+        # The first rule whose tools the response names and whose intent the
+        # message states explicitly decides the chain
+        for tools, intent, build_steps in _CHAIN_RULES:
+            if all(tool in response for tool in tools) and intent.search(original_message):
+                return build_steps(original_message)
         
         return None
     
+    async def _run_tool(
+        self, tool_name: str, query: str, namespace: str, raise_errors: bool = False
+    ) -> str:
+        """Run a single tool, passing ``namespace`` to RAG.
+
+        The tool is looked up in TOOLS on every call, and RAG runs through its
+        Tool like the others, so it records metrics and reports errors the same way.
+        With ``raise_errors`` a failing tool raises instead of returning its
+        error message.
+        """
+        tool = TOOLS[tool_name]
+        kwargs = {"namespace": namespace} if tool_name == "rag" else {}
+        return await (tool.call if raise_errors else tool.run)(query, **kwargs)
+
     async def execute_chain(self, steps: List[ChainStep], namespace: str = "default") -> ChainResult:
-        """Execute a tool chain with proper dependency handling."""
-        import time
-        start_time = time.time()
+        """Execute a tool chain, running each step as soon as its dependencies finish.
+
+        Steps are scheduled from a topological sort of ``depends_on``, so
+        independent steps run concurrently. Chains with a dependency cycle run
+        sequentially in declaration order. ``execution_order`` records tools
+        in the order they completed.
+        """
+        start_time = time.perf_counter()
         
         results: Dict[str, str] = {}
         execution_order: List[str] = []
+
+        async def run_step(step: ChainStep) -> None:
+            result = await self._run_tool(step.tool_name, step.query, namespace)
+            results[step.tool_name] = result
+            execution_order.append(step.tool_name)
         
+        running: Dict[asyncio.Future, str] = {}
         try:
-            # Simple sequential execution for now
+            steps_by_name = {step.tool_name: step for step in steps}
             for step in steps:
-                # Check dependencies
-                if step.depends_on:
-                    missing_deps = [dep for dep in step.depends_on if dep not in results]
-                    if missing_deps:
-                        raise ValueError(f"Missing dependencies for {step.tool_name}: {missing_deps}")
-                
-                # Execute the tool
-                tool = TOOLS[step.tool_name]
-                
-                # Handle RAG tool with namespace
-                if step.tool_name == "rag":
-                    from .tools import _retrieve_context
-                    result = _retrieve_context(step.query, namespace=namespace)
-                else:
-                    result = await tool.run(step.query)
-                
-                results[step.tool_name] = result
-                execution_order.append(step.tool_name)
+                missing_deps = set(step.depends_on or ()).difference(steps_by_name)
+                if missing_deps:
+                    raise ValueError(f"Missing dependencies for {step.tool_name}: {sorted(missing_deps)}")
+
+            sorter = TopologicalSorter(
+                {name: set(step.depends_on or ()) for name, step in steps_by_name.items()}
+            )
+            try:
+                sorter.prepare()
+            except CycleError:
+                for step in steps:
+                    await run_step(step)
+            else:
+                while sorter.is_active():
+                    for name in sorter.get_ready():
+                        running[asyncio.ensure_future(run_step(steps_by_name[name]))] = name
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        sorter.done(running.pop(task))
+                        task.result()
             
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             
             return ChainResult(
                 success=True,
@@ -172,7 +225,7 @@ Be CONSERVATIVE - when in doubt, choose SINGLE. Only chain when user explicitly
             )
             
         except Exception as e:
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             return ChainResult(
                 success=False,
                 results=results,
@@ -180,26 +233,56 @@ Be CONSERVATIVE - when in doubt, choose SINGLE. Only chain when user explicitly
                 total_time=total_time,
                 error=str(e)
             )
+        finally:
+            for task in running:
+                task.cancel()
     
-    async def execute_parallel_tools(self, tool_queries: Dict[str, str], namespace: str = "default") -> Dict[str, str]:
-        """Execute multiple tools in parallel for efficiency."""
-        async def run_tool(tool_name: str, query: str) -> tuple[str, str]:
-            try:
-                tool = TOOLS[tool_name]
-                if tool_name == "rag":
-                    from .tools import _retrieve_context
-                    result = _retrieve_context(query, namespace=namespace)
-                else:
-                    result = await tool.run(query)
-                return tool_name, result
-            except Exception as e:
-                return tool_name, f"Error: {str(e)}"
-        
-        # Execute all tools in parallel
-        tasks = [run_tool(tool_name, query) for tool_name, query in tool_queries.items()]
-        results_list = await asyncio.gather(*tasks)
+    async def execute_parallel_tools(
+        self,
+        tool_queries: Dict[str, str],
+        namespace: str = "default",
+        max_concurrency: int = 4,
+        race: bool = False,
+    ) -> Dict[str, str]:
+        """Execute multiple tools in parallel for efficiency.
+
+        At most ``max_concurrency`` tools run at once. With ``race=True`` the
+        call returns as soon as one tool succeeds and cancels the rest; if
+        every tool fails, all of their errors are returned.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_tool(tool_name: str, query: str) -> tuple[str, str, bool]:
+            async with semaphore:
+                try:
+                    # Racing needs failures raised, not returned as a winning message
+                    result = await self._run_tool(tool_name, query, namespace, raise_errors=race)
+                    return tool_name, result, True
+                except Exception as e:
+                    return tool_name, f"Error: {str(e)}", False
         
-        return dict(results_list)
+        tasks = [
+            asyncio.ensure_future(run_tool(tool_name, query))
+            for tool_name, query in tool_queries.items()
+        ]
+        if not race:
+            return {name: result for name, result, _ in await asyncio.gather(*tasks)}
+
+        results: Dict[str, str] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                finished = [task.result() for task in done]
+                succeeded = {name: result for name, result, ok in finished if ok}
+                if succeeded:
+                    return succeeded
+                results.update((name, result) for name, result, _ in finished)
+            return results
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
 
 # Global tool chain instance
@@ -4,17 +4,21 @@ from __future__ import annotations
 
 import asyncio
 import datetime as _dt
-import os
+import functools
+import logging
 import random
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Awaitable, Callable, Dict, List, Any
+from typing import Awaitable, Callable, Dict, List, Any, Optional
 
-from dotenv import load_dotenv
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
 
-# Load environment variables
-load_dotenv()
+from .cache import TTLCache
+from .llm_client import llm_client
+from .prompts import QUERY_ENHANCEMENT_PROMPT
+from .settings import get_settings
 
 # Import RAG functionality
 try:
@@ -26,10 +30,27 @@ except ImportError:
     RAG_AVAILABLE = False
 
 
+logger = logging.getLogger(__name__)
+
+# Shared pool for blocking tool work (sync tools, vector search) so it
+# never runs on the event loop and stays bounded under concurrent requests.
+_TOOL_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="agentkit-tool")
+
+
+async def _run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the tool pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_TOOL_POOL, functools.partial(fn, *args, **kwargs))
+
+
 ToolFn = Callable[[str], "ToolResult"]
 ToolResult = str | Awaitable[str]
 
 
+# Numeric counters kept on each Tool, reported raw by get_performance_stats_raw
+_METRIC_FIELDS = ("total_calls", "total_time", "success_count", "error_count", "last_used")
+
+
 @dataclass(slots=True)
 class Tool:
     """Enhanced tool descriptor with performance monitoring."""
@@ -37,138 +58,231 @@ class Tool:
     name: str
     description: str
     fn: ToolFn
-    metrics: Dict[str, Any] = field(default_factory=lambda: {
-        "total_calls": 0,
-        "total_time": 0.0,
-        "success_count": 0,
-        "error_count": 0,
-        "last_used": None,
-        "average_response_time": 0.0
-    })
-
-    async def run(self, query: str) -> str:
-        """Execute the wrapped function with performance monitoring."""
-        start_time = time.time()
-        self.metrics["total_calls"] += 1
-        self.metrics["last_used"] = _dt.datetime.now().isoformat()
-        
+    # Performance counters, updated in place on every run
+    total_calls: int = field(default=0, init=False)
+    total_time: float = field(default=0.0, init=False)
+    success_count: int = field(default=0, init=False)
+    error_count: int = field(default=0, init=False)
+    # Epoch seconds of the last call, rendered as ISO only for display
+    last_used: Optional[float] = field(default=None, init=False)
+    # Whether fn is a coroutine function, checked once instead of per call
+    is_async: bool = field(init=False)
+    # Awaits fn directly or on the tool pool, chosen once from is_async
+    _invoke: Callable[[str], Awaitable[str]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.is_async = asyncio.iscoroutinefunction(self.fn)
+        self._invoke = self.fn if self.is_async else functools.partial(_run_blocking, self.fn)  # type: ignore[assignment]
+
+    async def call(self, query: str, **kwargs: Any) -> str:
+        """Execute the wrapped function with performance monitoring.
+
+        Keyword arguments, such as the RAG namespace, are passed through to it.
+        Errors are recorded and then re-raised.
+        """
+        start_ns = time.perf_counter_ns()
+        self.total_calls += 1
+        self.last_used = time.time()
+
         try:
-            if asyncio.iscoroutinefunction(self.fn):
-                result = await self.fn(query)  # type: ignore[arg-type]
-            else:
-                loop = asyncio.get_running_loop()
-                result = await loop.run_in_executor(None, self.fn, query)
-            
-            # Record success metrics
-            execution_time = time.time() - start_time
-            self.metrics["total_time"] += execution_time
-            self.metrics["success_count"] += 1
-            self.metrics["average_response_time"] = self.metrics["total_time"] / self.metrics["total_calls"]
-            
-            return result
-            
-        except Exception as e:
+            result = await self._invoke(query, **kwargs)
+        except Exception:
             # Record error metrics
-            execution_time = time.time() - start_time
-            self.metrics["total_time"] += execution_time
-            self.metrics["error_count"] += 1
-            self.metrics["average_response_time"] = self.metrics["total_time"] / self.metrics["total_calls"]
-            
+            self.total_time += (time.perf_counter_ns() - start_ns) * 1e-9
+            self.error_count += 1
+            raise
+
+        # Record success metrics
+        self.total_time += (time.perf_counter_ns() - start_ns) * 1e-9
+        self.success_count += 1
+        return result
+
+    async def run(self, query: str, **kwargs: Any) -> str:
+        """Execute the wrapped function, returning any error as a message."""
+        try:
+            return await self.call(query, **kwargs)
+        except Exception as e:
             error_msg = f"Tool {self.name} failed: {str(e)}"
-            print(f"[TOOL ERROR] {error_msg}")
+            logger.error("[TOOL ERROR] %s", error_msg)
             return error_msg
 
+    @property
+    def average_response_time(self) -> float:
+        """Mean time per call, derived from the counters when read."""
+        return self.total_time / self.total_calls if self.total_calls else 0.0
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Raw counters as a dict, including the average response time."""
+        return {**self.get_performance_stats_raw(), "average_response_time": self.average_response_time}
+
+    def reset_metrics(self) -> None:
+        """Zero the performance counters."""
+        self.total_calls = 0
+        self.total_time = 0.0
+        self.success_count = 0
+        self.error_count = 0
+        self.last_used = None
+
+    def get_performance_stats_raw(self) -> Dict[str, Any]:
+        """Get the unformatted performance counters for this tool."""
+        return {name: getattr(self, name) for name in _METRIC_FIELDS}
+
     def get_performance_stats(self) -> Dict[str, Any]:
-        """Get performance statistics for this tool."""
+        """Get performance statistics for this tool, formatted for display."""
         success_rate = (
-            (self.metrics["success_count"] / self.metrics["total_calls"] * 100) 
-            if self.metrics["total_calls"] > 0 else 0
+            (self.success_count / self.total_calls * 100)
+            if self.total_calls > 0 else 0
+        )
+        last_used = (
+            _dt.datetime.fromtimestamp(self.last_used).isoformat()
+            if self.last_used is not None else None
         )
         
         return {
             "name": self.name,
-            "total_calls": self.metrics["total_calls"],
+            "total_calls": self.total_calls,
             "success_rate": f"{success_rate:.1f}%",
-            "average_response_time": f"{self.metrics['average_response_time']:.2f}s",
-            "total_time": f"{self.metrics['total_time']:.2f}s",
-            "last_used": self.metrics["last_used"],
-            "errors": self.metrics["error_count"]
+            "average_response_time": f"{self.average_response_time:.2f}s",
+            "total_time": f"{self.total_time:.2f}s",
+            "last_used": last_used,
+            "errors": self.error_count
         }
 
 
-# Initialize Tavily client
-tavily_client = None
-tavily_api_key = os.getenv("TAVILY_API_KEY")
-if tavily_api_key:
-    try:
-        tavily_client = TavilyClient(api_key=tavily_api_key)
-    except Exception as e:
-        print(f"Warning: Failed to initialize Tavily client: {e}")
+# Tavily client, created on first search; one async client keeps its
+# connections alive across searches until close_tools() releases them
+tavily_client: Optional[AsyncTavilyClient] = None
+_tavily_initialized = False
+
+
+def _get_tavily_client() -> Optional[AsyncTavilyClient]:
+    """Return the shared Tavily client, creating it on first use."""
+    global tavily_client, _tavily_initialized
+    if tavily_client is None and not _tavily_initialized:
+        _tavily_initialized = True
+        tavily_api_key = get_settings().tavily_api_key
+        if tavily_api_key:
+            try:
+                tavily_client = AsyncTavilyClient(api_key=tavily_api_key)
+            except Exception as e:
+                logger.warning("Failed to initialize Tavily client: %s", e)
+    return tavily_client
+
+
+# Web results shown per search, and the content length kept for each
+WEB_RESULT_LIMIT = 3
+WEB_SNIPPET_CHARS = 200
+# Document text kept per RAG hit
+RAG_SNIPPET_CHARS = 600
+# Seconds to wait for Tavily before answering from the fallback instead
+WEB_SEARCH_TIMEOUT = 5.0
+# Tavily results are reused for repeated queries, briefly so news stays fresh
+WEB_CACHE_SIZE = 256
+WEB_CACHE_TTL_SECONDS = 60
+web_result_cache = TTLCache(max_size=WEB_CACHE_SIZE, ttl_seconds=WEB_CACHE_TTL_SECONDS)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M UTC"
+
+# (epoch minute, formatted stamp) of the last timestamp rendered
+_minute_stamp: tuple[int, str] = (-1, "")
+
+
+def _utc_minute_stamp() -> str:
+    """Return the current UTC time in ``TIMESTAMP_FORMAT``, formatted once per minute."""
+    global _minute_stamp
+    minute = int(time.time()) // 60
+    if _minute_stamp[0] != minute:
+        stamp = _dt.datetime.fromtimestamp(minute * 60, _dt.timezone.utc).strftime(TIMESTAMP_FORMAT)
+        _minute_stamp = (minute, stamp)
+    return _minute_stamp[1]
+
+
+def _format_web_result(index: int, result: Dict[str, Any]) -> str:
+    """Format one Tavily result, truncating its content to keep results manageable."""
+    content = result.get("content", "No content available")
+    if len(content) > WEB_SNIPPET_CHARS:
+        content = content[:WEB_SNIPPET_CHARS] + "..."
+    return f"{index}. **{result.get('title', 'No title')}**\n   {content}\n   Source: {result.get('url', '')}"
 
 
 async def _web_search(query: str) -> str:
     """Search the web using Tavily API for real, current information."""
-    if tavily_client:
+    client = _get_tavily_client()
+    if client:
+        # LLM_CACHE_ENABLED switches off web result caching along with the LLM cache
+        use_cache = get_settings().llm_cache_enabled
+        cached = web_result_cache.get(query) if use_cache else None
+        if cached is not None:
+            return cached
         try:
-            # Run Tavily search in thread pool to avoid async SSL issues
-            def run_search():
-                return tavily_client.search(  # type: ignore
-                    query=query, search_depth="basic", max_results=3
-                )
-
-            loop = asyncio.get_running_loop()
-            search_result = await loop.run_in_executor(None, run_search)
+            search_result = await asyncio.wait_for(
+                client.search(query=query, search_depth="basic", max_results=WEB_RESULT_LIMIT),
+                timeout=WEB_SEARCH_TIMEOUT,
+            )
 
             if search_result and "results" in search_result:
                 results = search_result["results"]
                 if results:
-                    formatted_results = []
-                    for i, result in enumerate(results[:3], 1):
-                        title = result.get("title", "No title")
-                        content = result.get("content", "No content available")
-                        url = result.get("url", "")
-
-                        # Truncate content to keep results manageable
-                        content = (
-                            content[:200] + "..." if len(content) > 200 else content
-                        )
-
-                        formatted_results.append(
-                            f"{i}. **{title}**\n   {content}\n   Source: {url}"
-                        )
-
-                    timestamp = _dt.datetime.now(_dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-                    return (
-                        f"Web search results for '{query}' (as of {timestamp}):\n\n"
-                        + "\n\n".join(formatted_results)
+                    formatted_results = "\n\n".join(
+                        _format_web_result(i, result)
+                        for i, result in enumerate(results[:WEB_RESULT_LIMIT], 1)
                     )
+                    timestamp = _utc_minute_stamp()
+                    result = f"Web search results for '{query}' (as of {timestamp}):\n\n{formatted_results}"
+                    if use_cache:
+                        web_result_cache.set(query, result)
+                    return result
 
             return f"No search results found for '{query}'. Tavily search returned empty results."
 
+        except asyncio.TimeoutError:
+            logger.warning("Tavily search timed out after %.1fs", WEB_SEARCH_TIMEOUT)
+            return _fallback_web_search(query)
         except Exception as e:
-            print(f"Error with Tavily search: {e}")
+            logger.warning("Error with Tavily search: %s", e)
             return _fallback_web_search(query)
 
     # Fallback when Tavily is not available
     return _fallback_web_search(query)
 
 
+async def close_tools() -> None:
+    """Close the pooled HTTP connections held by the Tavily client.
+
+    The next search creates a new client, so a later lifespan can search again.
+    """
+    global tavily_client, _tavily_initialized
+    client, tavily_client = tavily_client, None
+    _tavily_initialized = False
+    if client:
+        await client.close()
+
+
+# Simulated headlines for the web fallback
+_FALLBACK_HEADLINES = (
+    "Modular AI agents gain popularity in enterprise automation, showing 40% efficiency improvements",
+    "Researchers release lightweight open-source LLMs that run on consumer hardware",
+    "Startups embrace synthetic data pipelines to overcome training data limitations",
+    "New study shows AI agents reduce manual task completion time by 60%",
+    "Tech giants invest heavily in autonomous agent development for business applications",
+)
+
+
 def _fallback_web_search(query: str) -> str:
     """Fallback web search with simulated results when Tavily is not available."""
-    import random
+    headline = random.choice(_FALLBACK_HEADLINES)
+    timestamp = _utc_minute_stamp()
 
-    news_items = [
-        "Modular AI agents gain popularity in enterprise automation, showing 40% efficiency improvements",
-        "Researchers release lightweight open-source LLMs that run on consumer hardware",
-        "Startups embrace synthetic data pipelines to overcome training data limitations",
-        "New study shows AI agents reduce manual task completion time by 60%",
-        "Tech giants invest heavily in autonomous agent development for business applications",
-    ]
+    return f"Search results for '{query}' (as of {timestamp}):\n\n• {headline}\n\n[Note: This is simulated search data - Tavily API not available]"
 
-    headline = random.choice(news_items)
-    timestamp = _dt.datetime.now(_dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
-    return f"Search results for '{query}' (as of {timestamp}):\n\n• {headline}\n\n[Note: This is simulated search data - Tavily API not available]"
+# Matches the client's "LLM unavailable" fallback text in one case-insensitive pass
+_LLM_UNAVAILABLE_RE = re.compile(r"unable to access|api.*key|key.*api", re.I | re.S)
+
+
+def _is_short_query(query: str) -> bool:
+    """Whether a query has too few words to benefit from LLM enhancement."""
+    return len(query.split()) <= 2
 
 
 async def _enhance_query(query: str) -> str:
@@ -181,26 +295,18 @@ async def _enhance_query(query: str) -> str:
     - Context preservation
     - Key concept extraction
     """
-    from .llm_client import llm_client
-    
     # For very short queries, return as-is
-    if len(query.split()) <= 2:
+    if _is_short_query(query):
         return query
     
     try:
         # Use LLM to extract key search terms and concepts
-        prompt = f"""Given this user query, extract the key search terms and concepts that would be most effective for semantic document search. Remove filler words but preserve important context.
-
-User Query: "{query}"
-
-Return only the enhanced search query without any explanation. Keep it concise and focused on the core concepts. If the query is already optimal, return it unchanged.
-
-Enhanced Query:"""
+        prompt = QUERY_ENHANCEMENT_PROMPT.format(query=query)
         
-        enhanced = await llm_client.generate_response(prompt, model="gemini")
+        enhanced = await llm_client.generate_response(prompt, model="gemini", cache=True)
         
         # Check if we got an error/fallback message from LLM
-        if "unable to access" in enhanced.lower() or "api" in enhanced.lower() and "key" in enhanced.lower():
+        if _LLM_UNAVAILABLE_RE.search(enhanced):
             # LLM not available, return original
             return query
         
@@ -218,7 +324,7 @@ Enhanced Query:"""
         return enhanced
         
     except Exception as e:
-        print(f"Query enhancement error: {e}")
+        logger.warning("Query enhancement error: %s", e)
         # Fallback to original query on error
         return query
 
@@ -229,10 +335,12 @@ async def _retrieve_context(query: str, namespace: str = "default", k: int = 5)
         return _fallback_rag_search(query)
 
     try:
-        # Apply advanced query understanding using LLM
-        enhanced_query = await _enhance_query(query)
+        # Apply advanced query understanding using LLM; one- and two-word
+        # queries are searched as-is, so they skip the coroutine entirely
+        enhanced_query = query if _is_short_query(query) else await _enhance_query(query)
         
-        hits = vector_query(namespace, enhanced_query, k=k)
+        # Embedding + Chroma lookup are blocking; keep them off the event loop
+        hits = await _run_blocking(vector_query, namespace, enhanced_query, k=k)
         if not hits:
             return f"[RAG] No relevant documents found in namespace '{namespace}' for query: '{query}'\n\nThis could mean:\n1. No documents have been ingested yet\n2. The documents don't contain relevant information\n3. Try a different search term or upload relevant documents first"
 
@@ -241,38 +349,34 @@ async def _retrieve_context(query: str, namespace: str = "default", k: int = 5)
         citations = []
         
         for i, h in enumerate(hits, 1):
-            src = h["metadata"].get("filename", "unknown")
-            chunk_num = h["metadata"].get("chunk", "?")
-            doc_id = h["metadata"].get("doc_id", "unknown")
-            distance = h.get("distance", "N/A")
-            relevance_score = h.get("relevance_score", 0.0)
+            metadata = h["metadata"]
+            src = metadata.get("filename", "unknown")
+            chunk_num = metadata.get("chunk", "?")
+            relevance = f"{h.get('relevance_score', 0.0):.2%}"
             
             # Build citation
-            citation = f"[{i}] {src}, chunk {chunk_num} (relevance: {relevance_score:.2%})"
-            citations.append(citation)
+            citations.append(f"[{i}] {src}, chunk {chunk_num} (relevance: {relevance})")
 
             # Truncate text for manageable context
-            text = h["text"][:600]
-            if len(h["text"]) > 600:
-                text += "..."
+            text = h["text"]
+            if len(text) > RAG_SNIPPET_CHARS:
+                text = text[:RAG_SNIPPET_CHARS] + "..."
 
             # Format with citation reference
-            lines.append(f"**Source [{i}]: {src}** (chunk #{chunk_num}, relevance: {relevance_score:.2%})\n{text}")
+            lines.append(f"**Source [{i}]: {src}** (chunk #{chunk_num}, relevance: {relevance})\n{text}")
 
-        timestamp = _dt.datetime.now(_dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-        
         # Create structured result with citations
-        result = (
-            f"RAG search results for '{query}' in namespace '{namespace}' (as of {timestamp}):\n\n"
-            + "\n\n".join(lines)
-            + "\n\n---\n**Citations:**\n"
-            + "\n".join(citations)
-        )
+        result = "".join((
+            f"RAG search results for '{query}' in namespace '{namespace}' (as of {_utc_minute_stamp()}):\n\n",
+            "\n\n".join(lines),
+            "\n\n---\n**Citations:**\n",
+            "\n".join(citations),
+        ))
 
         return result
 
     except Exception as e:
-        print(f"RAG search error: {e}")
+        logger.warning("RAG search error: %s", e)
         return f"[RAG] Error retrieving documents: {str(e)}\n\nFalling back to general knowledge."
 
 
@@ -309,51 +413,23 @@ def _memory_lookup(query: str) -> str:
     now = _dt.datetime.now(_dt.timezone.utc).isoformat(timespec="seconds")
 
     # Extract what the user wants to remember/recall
-    if "remember" in query.lower():
-        content = query.lower().replace("remember", "").replace("that", "").strip()
+    lowered = query.lower()
+    if "remember" in lowered:
+        content = lowered.replace("remember", "").replace("that", "").strip()
         return f"[{now} UTC] Stored in memory: {content}\n\nI'll remember this information for our conversation."
-    elif "recall" in query.lower() or "what did" in query.lower():
+    elif "recall" in lowered or "what did" in lowered:
         return f"[{now} UTC] Memory recall request for: {query}\n\n[Note: This is a demonstration - in a full implementation, I would search stored memories]"
     else:
         return f"[{now} UTC] Memory operation: {query}\n\nMemory system is ready to store or recall information."
 
 
-async def _rag_wrapper(query: str) -> str:
-    """Wrapper for RAG that uses default namespace - will be overridden by agent."""
-    return await _retrieve_context(query, namespace="default")
-
-
 def _idle(query: str) -> str:
     """Provide helpful fallback response when no specialized tool is relevant."""
     return f"I understand you said: '{query}'. While I don't have a specialized tool for this, I'm here to help with web searches, document explanations, or memory functions."
 
 
-async def _hybrid_search(query: str, namespace: str = "default") -> str:
-    """
-    Hybrid search combining web search and document retrieval for comprehensive results.
-    
-    This advanced feature:
-    - Searches both web (current information) and documents (uploaded knowledge)
-    - Provides source attribution from both sources
-    - Combines results intelligently for better context
-    """
-    # Execute both searches in parallel for efficiency
-    web_task = asyncio.create_task(_web_search(query))
-    rag_task = asyncio.create_task(_retrieve_context(query, namespace, 3))
-    
-    # Wait for both to complete
-    web_results, rag_results = await asyncio.gather(web_task, rag_task, return_exceptions=True)
-    
-    # Handle potential errors
-    if isinstance(web_results, Exception):
-        web_results = f"Web search error: {str(web_results)}"
-    if isinstance(rag_results, Exception):
-        rag_results = f"Document search error: {str(rag_results)}"
-    
-    timestamp = _dt.datetime.now(_dt.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-    
-    # Combine results with clear attribution
-    result = f"""Hybrid search results for '{query}' (as of {timestamp}):
+# Layout of a hybrid search answer, with clear attribution for each source
+_HYBRID_TEMPLATE = """Hybrid search results for '{query}' (as of {timestamp}):
 
 ═══════════════════════════════════════
 📚 FROM YOUR DOCUMENTS:
@@ -370,20 +446,40 @@ async def _hybrid_search(query: str, namespace: str = "default") -> str:
 ═══════════════════════════════════════
 This response combines information from both your uploaded documents and current web sources to provide comprehensive, up-to-date answers with full source attribution.
 """
-    
-    return result
 
 
-def _hybrid_wrapper(query: str) -> str:
-    """Wrapper for hybrid search - will be overridden by agent with namespace."""
-    # This is a synchronous wrapper that creates an event loop if needed
+# Seconds each hybrid source may take before the answer is sent without it
+HYBRID_SOURCE_TIMEOUT = 5.0
+
+
+async def _hybrid_source(search: Awaitable[str], label: str) -> str:
+    """Await one hybrid source, turning a timeout or error into a placeholder."""
     try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        async with asyncio.timeout(HYBRID_SOURCE_TIMEOUT):
+            return await search
+    except TimeoutError:
+        return f"{label} timed out after {HYBRID_SOURCE_TIMEOUT:.0f}s"
+    except Exception as e:
+        return f"{label} error: {str(e)}"
+
+
+async def _hybrid_search(query: str, namespace: str = "default") -> str:
+    """
+    Hybrid search combining web search and document retrieval for comprehensive results.
     
-    return loop.run_until_complete(_hybrid_search(query, namespace="default"))
+    This advanced feature:
+    - Searches both web (current information) and documents (uploaded knowledge)
+    - Provides source attribution from both sources
+    - Combines results intelligently for better context
+    """
+    # Execute both searches in parallel for efficiency
+    async with asyncio.TaskGroup() as group:
+        web_task = group.create_task(_hybrid_source(_web_search(query), "Web search"))
+        rag_task = group.create_task(_hybrid_source(_retrieve_context(query, namespace, 3), "Document search"))
+    
+    return _HYBRID_TEMPLATE.format(
+        query=query, timestamp=_utc_minute_stamp(), rag_results=rag_task.result(), web_results=web_task.result()
+    )
 
 
 TOOLS: Dict[str, Tool] = {
@@ -395,12 +491,12 @@ TOOLS: Dict[str, Tool] = {
     "rag": Tool(
         name="rag",
         description="Retrieve information from uploaded documents using vector search and semantic similarity with citations",
-        fn=_rag_wrapper,
+        fn=_retrieve_context,
     ),
     "hybrid": Tool(
         name="hybrid",
         description="Advanced hybrid search combining web search and document retrieval for comprehensive answers with source attribution",
-        fn=_hybrid_wrapper,
+        fn=_hybrid_search,
     ),
     "memory": Tool(
         name="memory",
@@ -423,11 +519,4 @@ def get_all_tool_performance_stats() -> Dict[str, Dict[str, Any]]:
 def reset_tool_metrics():
     """Reset performance metrics for all tools."""
     for tool in TOOLS.values():
-        tool.metrics = {
-            "total_calls": 0,
-            "total_time": 0.0,
-            "success_count": 0,
-            "error_count": 0,
-            "last_used": None,
-            "average_response_time": 0.0
-        }
+        tool.reset_metrics()
@@ -1,8 +1,14 @@
 import sys
 import os
-from dotenv import load_dotenv
 from typing import List, Optional
 
+# Add the parent directory to Python path so we can import the agent module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+# The constants below are read at import, so load .env here. The agent
+# package reads its own settings lazily on first use.
 load_dotenv()
 
 # Configuration from environment variables
@@ -14,24 +20,30 @@ ENABLE_RETRY_LOGIC = os.getenv("ENABLE_RETRY_LOGIC", "true").lower() == "true"
 MAX_RETRY_ATTEMPTS = int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
 RETRY_DELAY_SECONDS = int(os.getenv("RETRY_DELAY_SECONDS", "1"))
 
-# Add the parent directory to Python path so we can import the agent module
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any
-from agent.agent import run_agent_with_history
+from agent.agent import HISTORY_TRIM_BLOCK, run_agent_with_history, stream_agent_with_history
 from agent.llm_client import llm_client
-from agent.document_processor import DocumentProcessor
+from agent.router import close_routing_store, open_routing_store
+from agent.tools import close_tools
+from agent.document_processor import DocumentProcessor, PDFIUM_AVAILABLE
 from agent.file_manager import file_manager
+from agent.settings import get_settings
+import asyncio
 import uuid
 import tempfile
+import atexit
 import logging
+import logging.handlers
+import queue
 import traceback
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from pathlib import Path
 from rag.ingest import build_doc_chunks
 from rag.store import upsert_chunks, list_collections, delete_namespace, get_collection, delete_document, get_config
 from app import database as db
@@ -42,7 +54,7 @@ from app.security import (
     add_security_headers,
     rate_limit_handler,
     sanitize_error_message,
-    validate_file_upload,
+    validate_upload_filename,
     get_allowed_origins,
     ChatRequest,
     NamespaceRequest,
@@ -51,15 +63,63 @@ from app.security import (
 )
 from slowapi.errors import RateLimitExceeded
 
-# Configure logging for error tracking
+# Configure logging for error tracking. Records are queued and written to
+# stderr by a listener thread, so request handlers never block on log I/O.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logging.basicConfig(
     level=logging.INFO if os.getenv("ENVIRONMENT") == "production" else logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    # Only the message is rendered on the queue side; the listener adds the prefix
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
 )
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+
+    class ORJSONResponse(JSONResponse):
+        """JSONResponse that serializes with orjson."""
+
+        def render(self, content: Any) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+    def _dumps(content: Any) -> str:
+        """Serialize ``content`` to a JSON string with orjson."""
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    _dumps = json.dumps
+    DEFAULT_RESPONSE_CLASS = JSONResponse
+
+# Routing decisions and metrics survive restarts, next to the conversation DB
+ROUTING_STORE_PATH = Path(__file__).parent.parent / "uploads" / "routing.db"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the LLM client and routing cache on startup and release them on shutdown."""
+    # Read the agent settings up front so invalid values are reported at startup
+    get_settings()
+    # Runs alongside startup so the first chat request finds an open connection
+    prewarm = asyncio.create_task(llm_client.prewarm())
+    open_routing_store(ROUTING_STORE_PATH)
+    yield
+    prewarm.cancel()
+    close_routing_store()
+    await llm_client.close()
+    await close_tools()
+
+
 app = FastAPI(
     title="AgentKit Chat API",
+    lifespan=lifespan,
+    default_response_class=DEFAULT_RESPONSE_CLASS,
     version="1.0.0",
     docs_url="/docs" if os.getenv("ENVIRONMENT") != "production" else None,  # Disable docs in prod
     redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "production" else None
@@ -220,26 +280,8 @@ class ErrorCodes:
     CONFLICT = "CONFLICT"
 
 
-@app.post("/chat")
-@limiter.limit("10/minute")  # Rate limit: 10 requests per minute
-async def chat(
-    request: Request,  # Required for rate limiting
-    message: str = Form(...),
-    model: str = Form(...),
-    history: str = Form(default="[]"),  # JSON string of message history
-    files: List[UploadFile] = File(default=[]),
-    namespace: str = Form(default="default"),  # RAG namespace for document isolation
-    session_id: str = Form(default="default"),  # Session ID for conversation context
-    search_mode: str = Form(default="auto"),  # Search mode: auto, web, documents, hybrid
-):
-    """
-    Send a chat message to AgentKit with optional file attachments and conversation history.
-    Supports RAG retrieval from previously ingested documents using namespace isolation.
-    Advanced search modes: auto (intelligent selection), web, documents, or hybrid (both).
-
-    Rate limited to 10 requests per minute per IP address.
-    """
-    # Input validation
+def _validate_chat_params(message: str, model: str, search_mode: str, namespace: str) -> None:
+    """Validate the scalar form fields shared by the chat endpoints."""
     if not message or len(message) > 10000:
         raise HTTPException(status_code=400, detail="Message must be between 1 and 10000 characters")
 
@@ -260,7 +302,9 @@ async def chat(
             detail="Namespace can only contain letters, numbers, underscores, and hyphens"
         )
 
-    # Parse and validate conversation history
+
+def _parse_chat_history(history: str) -> List[Dict[str, Any]]:
+    """Parse and validate the JSON conversation history form field."""
     try:
         if len(history) > 500000:  # 500KB limit on history
             raise HTTPException(status_code=400, detail="Conversation history too large")
@@ -274,42 +318,52 @@ async def chat(
             if msg['role'] not in ['user', 'assistant', 'system']:
                 raise HTTPException(status_code=400, detail="Invalid message role in history")
 
-        # Limit conversation history to prevent memory issues
-        if len(conversation_history) > CONVERSATION_HISTORY_LIMIT:
-            conversation_history = conversation_history[-CONVERSATION_HISTORY_LIMIT:]
+        # Limit conversation history to prevent memory issues. Trim in whole
+        # blocks so the agent's summarized prefix only changes once per block.
+        excess = len(conversation_history) - CONVERSATION_HISTORY_LIMIT
+        if excess > 0:
+            cut = -(-excess // HISTORY_TRIM_BLOCK) * HISTORY_TRIM_BLOCK
+            conversation_history = conversation_history[cut:]
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON in history parameter")
 
-    # Process uploaded files if any
+    return conversation_history
+
+
+async def _attach_files(message: str, files: List[UploadFile]) -> tuple[str, List[Dict]]:
+    """Store and process uploaded files, returning the augmented message and stored metadata."""
     processed_files = []
     stored_files = []
 
     if files and files[0].filename:  # Check if files were actually uploaded
         for file in files:
             if file.filename:
-                content = await file.read()
-
-                # Validate file with comprehensive security checks
+                # Validate the name and type before reading anything
                 try:
-                    safe_filename, _ = validate_file_upload(file.filename, content, MAX_FILE_SIZE)
+                    safe_filename = validate_upload_filename(file.filename)
                     logger.info(f"Chat file validated: {safe_filename}")
                 except HTTPException as e:
                     logger.warning(f"Chat file validation failed: {e.detail}")
                     raise
 
-                # Store file permanently
-                file_metadata = await file_manager.store_file(
-                    content,
-                    safe_filename,  # Use sanitized filename
-                    file.content_type or "application/octet-stream",
-                    user_id="default",  # TODO: Add proper user management
-                )
+                tmp_path, file_size = await _spool_upload(file, Path(safe_filename).suffix)
+                try:
+                    # Store file permanently, moving the spooled upload into place
+                    file_metadata = await file_manager.store_file(
+                        Path(tmp_path),
+                        safe_filename,  # Use sanitized filename
+                        file.content_type or "application/octet-stream",
+                        user_id="default",  # TODO: Add proper user management
+                    )
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
                 stored_files.append(file_metadata)
-                audit_log("FILE_UPLOAD", {"filename": safe_filename, "size": len(content)})
+                audit_log("FILE_UPLOAD", {"filename": safe_filename, "size": file_size})
 
                 # Process file content for immediate use
                 file_result = await DocumentProcessor.process_file(
-                    content,
+                    Path(file_metadata["file_path"]),
                     file.filename,
                     file.content_type or "application/octet-stream",
                 )
@@ -337,10 +391,18 @@ async def chat(
     else:
         message_with_files = message
 
-    response = await run_agent_with_history(
-        message_with_files, model, conversation_history, namespace, session_id, search_mode
-    )
+    return message_with_files, stored_files
 
+
+def _finalize_chat_response(
+    response: Dict[str, Any],
+    stored_files: List[Dict],
+    message: str,
+    model: str,
+    namespace: str,
+    session_id: str,
+) -> Dict[str, Any]:
+    """Attach stored file info and persist the exchange to the conversation store."""
     # Add stored file information to response
     if stored_files:
         response["stored_files"] = [
@@ -396,6 +458,75 @@ async def chat(
     return response
 
 
+@app.post("/chat")
+@limiter.limit("10/minute")  # Rate limit: 10 requests per minute
+async def chat(
+    request: Request,  # Required for rate limiting
+    message: str = Form(...),
+    model: str = Form(...),
+    history: str = Form(default="[]"),  # JSON string of message history
+    files: List[UploadFile] = File(default=[]),
+    namespace: str = Form(default="default"),  # RAG namespace for document isolation
+    session_id: str = Form(default="default"),  # Session ID for conversation context
+    search_mode: str = Form(default="auto"),  # Search mode: auto, web, documents, hybrid
+):
+    """
+    Send a chat message to AgentKit with optional file attachments and conversation history.
+    Supports RAG retrieval from previously ingested documents using namespace isolation.
+    Advanced search modes: auto (intelligent selection), web, documents, or hybrid (both).
+
+    Rate limited to 10 requests per minute per IP address.
+    """
+    _validate_chat_params(message, model, search_mode, namespace)
+    conversation_history = _parse_chat_history(history)
+
+    # Process uploaded files if any
+    message_with_files, stored_files = await _attach_files(message, files)
+
+    response = await run_agent_with_history(
+        message_with_files, model, conversation_history, namespace, session_id, search_mode
+    )
+
+    return _finalize_chat_response(response, stored_files, message, model, namespace, session_id)
+
+
+@app.post("/chat/stream")
+@limiter.limit("10/minute")  # Rate limit: 10 requests per minute
+async def chat_stream(
+    request: Request,  # Required for rate limiting
+    message: str = Form(...),
+    model: str = Form(...),
+    history: str = Form(default="[]"),  # JSON string of message history
+    files: List[UploadFile] = File(default=[]),
+    namespace: str = Form(default="default"),  # RAG namespace for document isolation
+    session_id: str = Form(default="default"),  # Session ID for conversation context
+    search_mode: str = Form(default="auto"),  # Search mode: auto, web, documents, hybrid
+):
+    """
+    Streaming variant of /chat using Server-Sent Events.
+
+    Emits ``chunk`` events with answer text as it is generated, then a final
+    ``done`` event carrying the same payload /chat returns.
+
+    Rate limited to 10 requests per minute per IP address.
+    """
+    _validate_chat_params(message, model, search_mode, namespace)
+    conversation_history = _parse_chat_history(history)
+    message_with_files, stored_files = await _attach_files(message, files)
+
+    async def event_stream():
+        async for event in stream_agent_with_history(
+            message_with_files, model, conversation_history, namespace, session_id, search_mode
+        ):
+            if event["type"] == "done":
+                event = _finalize_chat_response(
+                    event, stored_files, message, model, namespace, session_id
+                )
+            yield f"data: {_dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.get("/models", response_model=ModelResponse)
 async def get_models():
     """
@@ -408,6 +539,7 @@ async def get_models():
 
 
 # File validation constants
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Uploads are streamed to disk 1MB at a time
 SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.txt', '.md', '.markdown', '.json']
 SUPPORTED_MIME_TYPES = {
     'application/pdf': '.pdf',
@@ -418,15 +550,32 @@ SUPPORTED_MIME_TYPES = {
 }
 
 
-def validate_file_upload(file: UploadFile, content: bytes) -> Dict[str, Any]:
+def validate_file_upload(file: UploadFile, file_size: int) -> Dict[str, Any]:
     """
     Validate file upload with comprehensive checks.
     
     Returns validation result with details.
     Raises HTTPException if validation fails.
     """
-    errors = []
-    
+    file_ext = _check_upload_type(file)
+    _check_upload_size(file_size)
+
+    return {
+        "valid": True,
+        "filename": file.filename,
+        "size": file_size,
+        "extension": file_ext,
+        "mime_type": file.content_type
+    }
+
+
+def _check_upload_type(file: UploadFile) -> str:
+    """
+    Validate an upload's filename, extension and MIME type.
+
+    These checks need no content, so they run before the upload is read.
+    Returns the lowercased file extension.
+    """
     # Check if filename exists
     if not file.filename:
         raise HTTPException(
@@ -452,9 +601,12 @@ def validate_file_upload(file: UploadFile, content: bytes) -> Dict[str, Any]:
     # Validate MIME type
     if file.content_type and file.content_type not in SUPPORTED_MIME_TYPES:
         logger.warning(f"Unexpected MIME type: {file.content_type} for file: {file.filename}")
-    
-    # Check file size
-    file_size = len(content)
+
+    return file_ext
+
+
+def _check_upload_size(file_size: int) -> None:
+    """Reject empty or oversized uploads once their size is known."""
     if file_size == 0:
         raise HTTPException(
             status_code=400,
@@ -466,14 +618,32 @@ def validate_file_upload(file: UploadFile, content: bytes) -> Dict[str, Any]:
             status_code=413,
             detail=f"File too large ({file_size / (1024*1024):.2f}MB). Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB"
         )
-    
-    return {
-        "valid": True,
-        "filename": file.filename,
-        "size": file_size,
-        "extension": file_ext,
-        "mime_type": file.content_type
-    }
+
+
+async def _spool_upload(file: UploadFile, suffix: str) -> tuple[str, int]:
+    """
+    Stream an upload into a temporary file without holding it in memory.
+
+    Returns the temporary file path and the upload size. Raises HTTPException
+    as soon as the upload exceeds MAX_FILE_SIZE.
+    """
+    file_size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB"
+                    )
+                await asyncio.to_thread(tmp_file.write, chunk)
+        except BaseException:
+            tmp_file.close()
+            await asyncio.to_thread(os.unlink, tmp_file.name)
+            raise
+
+    return tmp_file.name, file_size
 
 
 @app.post("/docs/ingest")
@@ -495,51 +665,52 @@ async def ingest_doc(
     Supported formats: PDF, DOCX, TXT, MD, JSON
     Max file size: 50MB
     """
-    # Read file content
-    content = await file.read()
-    
-    # Comprehensive file validation
+    # Reject unsupported files before reading any of the upload
     try:
-        validation_result = validate_file_upload(file, content)
-        logger.info(f"File validation passed: {validation_result['filename']} ({validation_result['size']} bytes)")
+        file_ext = _check_upload_type(file)
     except HTTPException as e:
         logger.warning(f"File validation failed: {e.detail}")
         raise
 
-    # Save temporary file for processing
-    file_ext = os.path.splitext(file.filename.lower())[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-        tmp_file.write(content)
-        tmp_path = tmp_file.name
+    # Stream the upload to a temporary file for processing
+    tmp_path, file_size = await _spool_upload(file, file_ext)
 
     try:
-        # Build document chunks with metadata
-        chunks = build_doc_chunks(
-            tmp_path,
-            metadata={
-                "filename": file.filename,
-                "namespace": namespace,
-                "session_id": session_id,
-                "doc_id": str(uuid.uuid4()),
-            },
-        )
+        try:
+            _check_upload_size(file_size)
+            logger.info(f"File validation passed: {file.filename} ({file_size} bytes)")
+        except HTTPException as e:
+            logger.warning(f"File validation failed: {e.detail}")
+            raise
 
-        # Store chunks in vector database
-        upsert_chunks(namespace, chunks)
+        try:
+            # Build document chunks with metadata
+            chunks = build_doc_chunks(
+                tmp_path,
+                metadata={
+                    "filename": file.filename,
+                    "namespace": namespace,
+                    "session_id": session_id,
+                    "doc_id": str(uuid.uuid4()),
+                },
+            )
 
-        return {
-            "status": "success",
-            "message": "Document ingested successfully",
-            "chunks": len(chunks),
-            "namespace": namespace,
-            "filename": file.filename,
-            "doc_id": chunks[0]["metadata"]["doc_id"] if chunks else None,
-        }
+            # Store chunks in vector database
+            upsert_chunks(namespace, chunks)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Failed to process document: {str(e)}"
-        )
+            return {
+                "status": "success",
+                "message": "Document ingested successfully",
+                "chunks": len(chunks),
+                "namespace": namespace,
+                "filename": file.filename,
+                "doc_id": chunks[0]["metadata"]["doc_id"] if chunks else None,
+            }
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to process document: {str(e)}"
+            )
 
     finally:
         # Clean up temporary file
@@ -613,6 +784,9 @@ async def get_file_support():
                 if "python-docx" in DocumentProcessor.get_missing_dependencies()
                 else "✅ Available"
             ),
+            "pdf_acceleration": (
+                "✅ Available" if PDFIUM_AVAILABLE else "pip install pypdfium2"
+            ),
         },
     }
 
@@ -640,7 +814,7 @@ async def list_namespaces():
                     "is_default": namespace == "default"
                 })
             except Exception as e:
-                print(f"Error getting count for namespace {namespace}: {e}")
+                logger.warning("Error getting count for namespace %s: %s", namespace, e)
                 namespace_info.append({
                     "name": namespace,
                     "document_count": 0,
@@ -907,7 +1081,8 @@ async def get_system_performance():
         "llm_status": {
             "available_models": llm_client.get_available_models(),
             "default_model": llm_client.get_default_model(),
-            "gemini_available": llm_client.is_available("gemini")
+            "gemini_available": llm_client.is_available("gemini"),
+            "response_cache": llm_client.response_cache.stats(),
         },
         "timestamp": _get_current_timestamp()
     }
@@ -939,13 +1114,20 @@ def clear_rag_cache():
 @app.post("/monitoring/reset")
 def reset_performance_metrics():
     """Reset all performance metrics (useful for testing)."""
-    from agent.router import reset_routing_metrics
-    from agent.tools import reset_tool_metrics
+    from agent.agent import clear_answer_cache
+    from agent.router import clear_routing_cache, reset_routing_metrics
+    from agent.tool_chain import tool_chain
+    from agent.tools import reset_tool_metrics, web_result_cache
     from rag.store import clear_cache
     
     reset_routing_metrics()
+    clear_routing_cache()
+    tool_chain.clear_detection_cache()
     reset_tool_metrics()
     clear_cache()
+    llm_client.response_cache.clear()
+    web_result_cache.clear()
+    clear_answer_cache()
     
     return {
         "message": "Performance metrics reset successfully",
@@ -976,7 +1158,7 @@ async def readyz():
     """
     checks = {
         "api": True,
-        "google_api_key": bool(os.getenv("GOOGLE_API_KEY")),
+        "google_api_key": bool(get_settings().google_api_key),
         "database": False,
         "vector_store": False,
     }
@@ -1028,8 +1210,8 @@ async def get_system_status():
         "configuration": {
             "max_file_size_mb": round(MAX_FILE_SIZE / (1024 * 1024), 1),
             "conversation_history_limit": CONVERSATION_HISTORY_LIMIT,
-            "google_api_configured": bool(os.getenv("GOOGLE_API_KEY")),
-            "tavily_api_configured": bool(os.getenv("TAVILY_API_KEY")),
+            "google_api_configured": bool(get_settings().google_api_key),
+            "tavily_api_configured": bool(get_settings().tavily_api_key),
             "rag_config": {
                 "embedding_model": rag_config.get("embedding_model"),
                 "default_k": rag_config.get("default_k"),
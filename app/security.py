@@ -221,6 +221,22 @@ def validate_file_upload(filename: str, content: bytes, max_size: int = 52428800
             detail=f"File too large. Maximum size is {max_size / (1024 * 1024):.1f}MB"
         )
 
+    return validate_upload_filename(filename), ""
+
+
+def validate_upload_filename(filename: str) -> str:
+    """
+    Validate an upload's filename and extension before reading its content.
+
+    Args:
+        filename: Original filename
+
+    Returns:
+        Sanitized filename
+
+    Raises:
+        HTTPException: If validation fails
+    """
     # Validate filename
     if not filename:
         raise HTTPException(status_code=400, detail="Filename is required")
@@ -252,7 +268,7 @@ def validate_file_upload(filename: str, content: bytes, max_size: int = 52428800
             detail=f"File type not supported. Allowed types: {', '.join(allowed_extensions)}"
         )
 
-    return safe_filename, ""
+    return safe_filename
 
 
 def generate_secure_token(length: int = 32) -> str:
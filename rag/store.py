@@ -1,10 +1,17 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+import importlib.util
 from typing import List, Dict, Optional
 import os
 from functools import lru_cache
 import hashlib
 import json
+import time
+
+# chromadb and sentence-transformers take seconds to import, so they are only
+# imported when the client or model is first needed. Fail at import time when
+# they are missing, as callers use ImportError to detect RAG support.
+for _dependency in ("chromadb", "sentence_transformers"):
+    if importlib.util.find_spec(_dependency) is None:
+        raise ImportError(f"{_dependency} is required for the RAG store")
 
 # Single, simple store for PoC
 _client = None
@@ -19,6 +26,10 @@ _query_cache: Dict[str, Dict] = {}
 _cache_max_size = 100
 _cache_enabled = True
 
+# namespace -> write counter, bumped on every upsert/delete. It is part of the
+# cache key, so results cached before a write are never served after it.
+_namespace_versions: Dict[str, int] = {}
+
 # Configuration for optimization
 _config = {
     "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",  # Fast, balanced model
@@ -42,6 +53,8 @@ def get_client():
             os.path.dirname(os.path.dirname(__file__)), "uploads", "chroma"
         )
         os.makedirs(persist_directory, exist_ok=True)
+        import chromadb
+
         _client = chromadb.PersistentClient(path=persist_directory)
     return _client
 
@@ -57,6 +70,8 @@ def get_model(model_name: Optional[str] = None):
     # Only reload if model changed
     if _model is None or _model_name != model_name:
         print(f"Loading embedding model: {model_name}")
+        from sentence_transformers import SentenceTransformer
+
         _model = SentenceTransformer(model_name)
         _model_name = model_name
     
@@ -91,11 +106,17 @@ def upsert_chunks(namespace: str, chunks: List[Dict]):
 
     # Upsert to ChromaDB
     col.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+    _bump_namespace_version(namespace)
+
+
+def _bump_namespace_version(namespace: str):
+    """Invalidate cached query results for a namespace after a write."""
+    _namespace_versions[namespace] = _namespace_versions.get(namespace, 0) + 1
 
 
 def _get_cache_key(namespace: str, query_text: str, k: int) -> str:
     """Generate cache key for query."""
-    key_data = f"{namespace}:{query_text}:{k}"
+    key_data = f"{namespace}:{_namespace_versions.get(namespace, 0)}:{query_text}:{k}"
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
@@ -104,12 +125,13 @@ def _get_cached_result(cache_key: str) -> Optional[List[Dict]]:
     if not _cache_enabled or not _config["cache_enabled"]:
         return None
     
-    if cache_key in _query_cache:
-        cached = _query_cache[cache_key]
-        # Simple cache without TTL check for now (can add timestamp check if needed)
-        return cached.get("result")
-    
-    return None
+    cached = _query_cache.get(cache_key)
+    if cached is None:
+        return None
+    if cached["expires_at"] < time.monotonic():
+        del _query_cache[cache_key]
+        return None
+    return cached["result"]
 
 
 def _cache_result(cache_key: str, result: List[Dict]):
@@ -125,7 +147,10 @@ def _cache_result(cache_key: str, result: List[Dict]):
         oldest_key = next(iter(_query_cache))
         del _query_cache[oldest_key]
     
-    _query_cache[cache_key] = {"result": result}
+    _query_cache[cache_key] = {
+        "result": result,
+        "expires_at": time.monotonic() + _config["cache_ttl_seconds"],
+    }
 
 
 def query(namespace: str, query_text: str, k: int = 5, use_cache: bool = True) -> List[Dict]:
@@ -194,6 +219,7 @@ def delete_document(namespace: str, doc_id: str):
         # Delete the chunks
         if chunk_ids_to_delete:
             col.delete(ids=chunk_ids_to_delete)
+            _bump_namespace_version(namespace)
             return len(chunk_ids_to_delete)
         return 0
     except Exception as e:
@@ -206,6 +232,7 @@ def delete_namespace(namespace: str):
     try:
         client = get_client()
         client.delete_collection(name=namespace)
+        _bump_namespace_version(namespace)
         if namespace in _collections:
             del _collections[namespace]
     except Exception as e:
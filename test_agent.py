@@ -2,6 +2,7 @@
 Tests for AgentKit agent functionality.
 """
 
+import asyncio
 import pytest
 import sys
 import os
@@ -12,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from agent.router import select_tool, _fallback_keyword_routing
 from agent.llm_client import LLMClient
 from agent.tools import TOOLS
+from agent.agent import ConversationBuffer
 
 
 class TestRouter:
@@ -77,6 +79,174 @@ class TestLLMClient:
         assert len(fallback) > 0
         assert "unable to access" in fallback.lower()
 
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_prompts_coalesced(self):
+        """Identical in-flight prompts share a single provider call."""
+        client = LLMClient()
+        calls = []
+
+        async def fake_generate(prompt, model, config):
+            calls.append(prompt)
+            await asyncio.sleep(0.01)
+            return f"answer to {prompt}"
+
+        client._generate = fake_generate
+        results = await asyncio.gather(
+            client.generate_response("same prompt"),
+            client.generate_response("same prompt"),
+            client.generate_response("other prompt"),
+        )
+
+        assert results == ["answer to same prompt", "answer to same prompt", "answer to other prompt"]
+        assert calls.count("same prompt") == 1
+        assert not client._inflight
+
+    @pytest.mark.asyncio
+    async def test_cached_responses_skip_provider(self):
+        """Opted-in prompts are answered from the response cache on repeat."""
+        client = LLMClient()
+        client.genai_client = object()
+        calls = []
+
+        async def fake_generate(prompt, model, config):
+            calls.append(prompt)
+            return f"answer to {prompt}"
+
+        client._generate = fake_generate
+        first = await client.generate_response("route this", cache=True)
+        second = await client.generate_response("route this", cache=True)
+        await client.generate_response("route this")
+
+        assert first == second == "answer to route this"
+        assert calls == ["route this", "route this"]
+        assert client.response_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_generation_overrides(self):
+        """Per-call sampling overrides reach the provider config."""
+        from agent.llm_client import GENERATION_CONFIG
+
+        client = LLMClient()
+        client.genai_client = object()
+        configs = []
+
+        async def fake_generate(prompt, model, config):
+            configs.append(config)
+            return "web"
+
+        client._generate = fake_generate
+        await client.generate_response("classify", temperature=0.0, max_output_tokens=16)
+        await client.generate_response("classify", temperature=0.0, max_output_tokens=16)
+        await client.generate_response("classify")
+
+        assert len(configs) == 2
+        assert configs[0].temperature == 0.0
+        assert configs[0].max_output_tokens == 16
+        assert configs[1] is GENERATION_CONFIG
+        assert GENERATION_CONFIG.max_output_tokens == 4000
+
+    @pytest.mark.asyncio
+    async def test_prewarm_tolerates_failures(self):
+        """Prewarming issues one cheap request and never raises."""
+        from types import SimpleNamespace
+
+        client = LLMClient()
+        calls = []
+
+        async def failing_list(config=None):
+            calls.append(config)
+            raise ConnectionError("offline")
+
+        client.genai_client = SimpleNamespace(
+            aio=SimpleNamespace(models=SimpleNamespace(list=failing_list))
+        )
+        await client.prewarm()
+
+        assert calls == [{"page_size": 1}]
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_retried(self, monkeypatch):
+        """Rate limits and 5xx are retried; other API errors fall back at once."""
+        from types import SimpleNamespace
+        from google.genai import errors
+        from agent import llm_client as llm_module
+
+        monkeypatch.setattr(llm_module, "RETRY_BASE_DELAY", 0)
+        failures = [errors.APIError(429, {}), errors.APIError(503, {})]
+        calls = []
+
+        async def generate_content(**kwargs):
+            calls.append(kwargs)
+            if failures:
+                raise failures.pop(0)
+            return SimpleNamespace(text="recovered")
+
+        client = LLMClient()
+        client.genai_client = SimpleNamespace(
+            aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+        )
+        config = llm_module.GENERATION_CONFIG
+        assert await client._generate("prompt", "gemini", config) == "recovered"
+        assert len(calls) == 3
+
+        failures.append(errors.APIError(400, {}))
+        assert await client._generate("prompt", "gemini", config) == client._fallback_response("prompt")
+        assert len(calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_model_discovery_deferred_and_cached(self, monkeypatch, tmp_path):
+        """Models load on first use, not construction, and are cached on disk."""
+        from types import SimpleNamespace
+        from agent import llm_client as llm_module
+
+        monkeypatch.setattr(llm_module, "MODELS_CACHE_PATH", tmp_path / "models.json")
+        listed = []
+
+        async def models():
+            for name in ["models/gemini-2.5-flash", "models/text-embedding-004"]:
+                yield SimpleNamespace(name=name)
+
+        async def list_models(config=None):
+            listed.append(config)
+            return models()
+
+        client = LLMClient()
+        assert client.get_available_models() == list(llm_module.FALLBACK_MODELS)
+
+        client.genai_client = SimpleNamespace(
+            aio=SimpleNamespace(models=SimpleNamespace(list=list_models))
+        )
+        await client._ensure_models_loaded()
+        assert client.get_available_models() == ["gemini-2.5-flash"]
+
+        # A second client reads the list from disk instead of the API
+        other = LLMClient()
+        other.genai_client = client.genai_client
+        await other._ensure_models_loaded()
+        assert other.get_available_models() == ["gemini-2.5-flash"]
+        assert len(listed) == 1
+
+    @pytest.mark.asyncio
+    async def test_closed_client_rebuilt_on_next_use(self, monkeypatch):
+        """close() drops the shared Gemini client and the next use builds a new one."""
+        from agent import llm_client as llm_module
+        from agent.settings import Settings
+
+        monkeypatch.setattr(llm_module, "get_settings", lambda: Settings(google_api_key="test-key"))
+        monkeypatch.setattr(llm_module, "_genai_clients", {})
+
+        client = LLMClient()
+        first = client.genai_client
+        assert first is not None
+
+        await client.close()
+        assert "test-key" not in llm_module._genai_clients
+
+        second = client.genai_client
+        assert second is not None and second is not first
+        assert llm_module._genai_clients["test-key"] is second
+        await client.close()
+
 
 class TestTools:
     """Test individual tool functionality."""
@@ -101,6 +271,403 @@ class TestTools:
             assert isinstance(tool.description, str)
             assert len(tool.description) > 10  # Should be descriptive
 
+    @pytest.mark.asyncio
+    async def test_sync_and_async_tools_dispatch(self):
+        """Sync tool functions run on the tool pool, async ones are awaited directly."""
+        import threading
+        from agent.tools import Tool
+
+        def sync_fn(query):
+            return threading.current_thread().name
+
+        async def async_fn(query):
+            return threading.current_thread().name
+
+        sync_tool = Tool(name="sync", description="sync test tool", fn=sync_fn)
+        async_tool = Tool(name="async", description="async test tool", fn=async_fn)
+
+        assert not sync_tool.is_async and async_tool.is_async
+        assert (await sync_tool.run("q")).startswith("agentkit-tool")
+        assert await async_tool.run("q") == threading.current_thread().name
+
+    @pytest.mark.asyncio
+    async def test_enhance_query_ignores_unavailable_llm(self, monkeypatch):
+        """Query enhancement keeps the original query when the LLM answers with its fallback."""
+        from agent import tools
+
+        replies = iter([
+            tools.llm_client._fallback_response("q"),
+            "Missing API Key",
+            "agentkit deployment steps",
+        ])
+
+        async def fake_generate(prompt, model="gemini", cache=False, **kwargs):
+            return next(replies)
+
+        monkeypatch.setattr(tools.llm_client, "generate_response", fake_generate)
+        query = "how do I deploy agentkit please"
+        assert await tools._enhance_query(query) == query
+        assert await tools._enhance_query(query) == query
+        assert await tools._enhance_query(query) == "agentkit deployment steps"
+
+    @pytest.mark.asyncio
+    async def test_web_results_cached(self, monkeypatch):
+        """Repeated web searches are answered from the result cache."""
+        from agent import tools
+
+        calls = []
+
+        class FakeTavily:
+            async def search(self, **kwargs):
+                calls.append(kwargs["query"])
+                return {"results": [{"title": "t", "content": "c", "url": "u"}]}
+
+        monkeypatch.setattr(tools, "tavily_client", FakeTavily())
+        tools.web_result_cache.clear()
+        try:
+            first = await tools._web_search("agent news")
+            assert await tools._web_search("agent news") == first
+            await tools._web_search("other news")
+            assert calls == ["agent news", "other news"]
+        finally:
+            tools.web_result_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_web_results_not_cached_when_disabled(self, monkeypatch):
+        """LLM_CACHE_ENABLED=false also turns off the web result cache."""
+        from agent import tools
+        from agent.settings import Settings
+
+        calls = []
+
+        class FakeTavily:
+            async def search(self, **kwargs):
+                calls.append(kwargs["query"])
+                return {"results": [{"title": "t", "content": "c", "url": "u"}]}
+
+        monkeypatch.setattr(tools, "tavily_client", FakeTavily())
+        monkeypatch.setattr(tools, "get_settings", lambda: Settings(llm_cache_enabled=False))
+        tools.web_result_cache.clear()
+        try:
+            await tools._web_search("agent news")
+            await tools._web_search("agent news")
+            assert calls == ["agent news", "agent news"]
+        finally:
+            tools.web_result_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_answers_without_slow_source(self, monkeypatch):
+        """A hybrid source that exceeds its budget is replaced by a placeholder."""
+        from agent import tools
+
+        async def slow_retrieve(query, namespace="default", k=5):
+            await asyncio.sleep(1)
+            return "documents"
+
+        async def fast_web(query):
+            return "web results"
+
+        monkeypatch.setattr(tools, "_retrieve_context", slow_retrieve)
+        monkeypatch.setattr(tools, "_web_search", fast_web)
+        monkeypatch.setattr(tools, "HYBRID_SOURCE_TIMEOUT", 0.05)
+
+        result = await tools._hybrid_search("agent news")
+        assert "web results" in result
+        assert "Document search timed out" in result
+
+    @pytest.mark.asyncio
+    async def test_rag_results_formatted_with_citations(self, monkeypatch):
+        """RAG hits are truncated and listed with matching citations."""
+        from agent import tools
+
+        hits = [
+            {"text": "x" * 700, "metadata": {"filename": "a.md", "chunk": 0}, "relevance_score": 0.875},
+            {"text": "short", "metadata": {}, "relevance_score": 0.5},
+        ]
+
+        enhanced = []
+
+        async def same_query(query):
+            enhanced.append(query)
+            return query
+
+        monkeypatch.setattr(tools, "RAG_AVAILABLE", True)
+        monkeypatch.setattr(tools, "vector_query", lambda namespace, query, k=5: hits)
+        monkeypatch.setattr(tools, "_enhance_query", same_query)
+
+        result = await tools._retrieve_context("deploy steps", namespace="docs")
+        assert enhanced == []
+        assert result.startswith("RAG search results for 'deploy steps' in namespace 'docs'")
+        assert f"**Source [1]: a.md** (chunk #0, relevance: 87.50%)\n{'x' * 600}..." in result
+        assert "**Source [2]: unknown** (chunk #?, relevance: 50.00%)\nshort" in result
+        assert result.endswith("**Citations:**\n[1] a.md, chunk 0 (relevance: 87.50%)\n[2] unknown, chunk ? (relevance: 50.00%)")
+
+        await tools._retrieve_context("how to deploy", namespace="docs")
+        assert enhanced == ["how to deploy"]
+
+    @pytest.mark.asyncio
+    async def test_slow_web_search_falls_back(self, monkeypatch):
+        """A Tavily call that exceeds the timeout is answered from the fallback."""
+        from agent import tools
+
+        class SlowTavily:
+            async def search(self, **kwargs):
+                await asyncio.sleep(0.3)
+                return {"results": [{"title": "late", "content": "late", "url": ""}]}
+
+        monkeypatch.setattr(tools, "tavily_client", SlowTavily())
+        monkeypatch.setattr(tools, "WEB_SEARCH_TIMEOUT", 0.05)
+
+        result = await tools._web_search("agent news")
+        assert "simulated search data" in result
+
+    @pytest.mark.asyncio
+    async def test_closed_tavily_client_recreated(self, monkeypatch):
+        """close_tools() releases the Tavily client and the next search makes a new one."""
+        from agent import tools
+        from agent.settings import Settings
+
+        monkeypatch.setattr(tools, "get_settings", lambda: Settings(tavily_api_key="tvly-test"))
+        monkeypatch.setattr(tools, "tavily_client", None)
+        monkeypatch.setattr(tools, "_tavily_initialized", False)
+
+        first = tools._get_tavily_client()
+        assert first is not None
+        await tools.close_tools()
+        assert tools.tavily_client is None
+
+        second = tools._get_tavily_client()
+        assert second is not None and second is not first
+        await tools.close_tools()
+
+    def test_minute_stamp_formatted_once_per_minute(self, monkeypatch):
+        """The search timestamp is rendered once per UTC minute and reused."""
+        from agent import tools
+
+        monkeypatch.setattr(tools.time, "time", lambda: 1_700_000_030.0)
+        stamp = tools._utc_minute_stamp()
+        assert stamp == "2023-11-14 22:13 UTC"
+        assert tools._utc_minute_stamp() is stamp
+
+        monkeypatch.setattr(tools.time, "time", lambda: 1_700_000_090.0)
+        assert tools._utc_minute_stamp() == "2023-11-14 22:14 UTC"
+
+
+class TestConversationBuffer:
+    """Test the append-only conversation window used for prompt building."""
+
+    @staticmethod
+    def _history(count):
+        return [{"role": "user", "content": f"message {i}"} for i in range(count)]
+
+    def test_short_history_kept_whole(self):
+        """Histories within the window keep every turn."""
+        buffer = ConversationBuffer.from_history(self._history(5))
+        assert buffer.cache_anchor == 0
+        assert len(buffer.window) == 5
+
+    def test_anchor_moves_in_blocks(self):
+        """The rendered prefix stays identical while the anchor is unchanged."""
+        earlier = ConversationBuffer.from_history(self._history(21))
+        later = ConversationBuffer.from_history(self._history(29))
+        assert earlier.cache_anchor == later.cache_anchor == 10
+        assert later.render().startswith(earlier.render())
+
+    def test_non_conversational_roles_dropped(self):
+        """System messages are not replayed as conversation turns."""
+        history = [
+            {"role": "system", "content": "ignored"},
+            {"role": "user", "content": "hi"},
+        ]
+        buffer = ConversationBuffer.from_history(history)
+        assert buffer.render() == "user: hi"
+
+
+class TestHistorySummary:
+    """Test summarising turns that fall out of the conversation window."""
+
+    @pytest.mark.asyncio
+    async def test_dropped_turns_summarised_once(self, monkeypatch):
+        """The summary is built in the background and reused afterwards."""
+        from agent import agent as agent_module
+
+        calls = []
+
+        async def fake_generate(prompt, model="gemini"):
+            calls.append(prompt)
+            return "The user introduced their project."
+
+        monkeypatch.setattr(agent_module.llm_client, "is_available", lambda model="gemini": True)
+        monkeypatch.setattr(agent_module.llm_client, "generate_response", fake_generate)
+        monkeypatch.setattr(agent_module.llm_client, "genai_client", object())
+
+        history = [{"role": "user", "content": f"message {i}"} for i in range(25)]
+        buffer = ConversationBuffer.from_history(history)
+
+        # First request schedules the summary without waiting for it
+        assert agent_module._history_summary(buffer) is None
+        await asyncio.gather(*agent_module._pending_summaries.values())
+
+        summary = agent_module._history_summary(buffer)
+        assert summary == "The user introduced their project."
+        assert len(calls) == 1
+        assert "message 0" in calls[0]
+
+        buffer.summary = summary
+        assert buffer.render().startswith("system: Summary of earlier conversation:")
+
+
+class TestAgentBatch:
+    """Test running several independent queries at once."""
+
+    @pytest.mark.asyncio
+    async def test_batch_bounded_and_ordered(self, monkeypatch):
+        """Results keep input order, failures become error entries."""
+        from agent import agent as agent_module
+
+        active = 0
+        peak = 0
+
+        async def fake_run_agent(message, model):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if message == "bad":
+                raise RuntimeError("boom")
+            return {"answer": f"answer to {message}"}
+
+        monkeypatch.setattr(agent_module, "run_agent", fake_run_agent)
+        results = await agent_module.run_agent_batch(
+            ["one", "bad", "three", "four"], "gemini", concurrency=2
+        )
+
+        assert [r["answer"] for r in results[::2]] == ["answer to one", "answer to three"]
+        assert results[1]["tool_used"] == "error"
+        assert results[1]["error"] == "boom"
+        assert peak == 2
+
+    def test_invalid_concurrency_setting_falls_back(self, monkeypatch):
+        """A malformed AGENT_MAX_CONCURRENCY uses the default instead of raising."""
+        from agent.settings import Settings, get_settings
+
+        monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "lots")
+        get_settings.cache_clear()
+        try:
+            assert get_settings().agent_max_concurrency == Settings.agent_max_concurrency
+        finally:
+            get_settings.cache_clear()
+
+
+class TestPrepareTurn:
+    """Test routing and tool execution ahead of answer generation."""
+
+    @pytest.mark.asyncio
+    async def test_route_cancelled_when_chain_detection_fails(self, monkeypatch):
+        """The concurrent routing call doesn't outlive a chain detection error."""
+        from agent import agent as agent_module
+
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow_select_tool(message, context):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "web"
+
+        async def failing_detection(message, context):
+            await started.wait()
+            raise RuntimeError("detection failed")
+
+        monkeypatch.setattr(agent_module, "_try_fast_route", lambda message, context: None)
+        monkeypatch.setattr(agent_module, "select_tool", slow_select_tool)
+        monkeypatch.setattr(agent_module.tool_chain, "detect_chain_opportunity", failing_detection)
+
+        with pytest.raises(RuntimeError, match="detection failed"):
+            await agent_module._prepare_turn("tell me something", "gemini", [], "default", "auto")
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_current_turn_reaches_prompt_once(self, monkeypatch):
+        """Prior turns form the context; the message and tool output appear once."""
+        from agent import agent as agent_module
+        from agent.tools import Tool
+
+        async def fake_web(query):
+            return "fixed web results"
+
+        async def no_chain(message, context):
+            return None
+
+        monkeypatch.setattr(agent_module.tool_chain, "detect_chain_opportunity", no_chain)
+        monkeypatch.setitem(TOOLS, "web", Tool(name="web", description="fake web", fn=fake_web))
+        history = [
+            {"role": "user", "content": "earlier question"},
+            {"role": "assistant", "content": "earlier answer"},
+        ]
+
+        turn = await agent_module._prepare_turn(
+            "what is new with agentkit", "gemini", history, "default", "web"
+        )
+
+        assert "earlier question" in turn.prompt and "earlier answer" in turn.prompt
+        assert turn.prompt.count("what is new with agentkit") == 1
+        assert turn.prompt.count("fixed web results") == 1
+
+
+class TestAnswerCache:
+    """Test reuse of final answers for repeated turns."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_turn_served_from_cache(self, monkeypatch):
+        """The same message, tool output and recent turns reuse the answer."""
+        from agent import agent as agent_module
+        from agent.tools import Tool
+
+        calls = []
+
+        async def fake_generate(prompt, model="gemini", **kwargs):
+            calls.append(prompt)
+            return f"answer {len(calls)}"
+
+        async def fake_web(query):
+            return "fixed web results"
+
+        async def no_chain(message, context):
+            return None
+
+        monkeypatch.setattr(agent_module.tool_chain, "detect_chain_opportunity", no_chain)
+        monkeypatch.setitem(TOOLS, "web", Tool(name="web", description="fake web", fn=fake_web))
+        monkeypatch.setattr(agent_module.llm_client, "generate_response", fake_generate)
+        monkeypatch.setattr(agent_module.llm_client, "genai_client", object())
+        agent_module.clear_answer_cache()
+        try:
+            first = await agent_module.run_agent_with_history("Latest news", "gemini", [], search_mode="web")
+            second = await agent_module.run_agent_with_history("latest  news", "gemini", [], search_mode="web")
+            history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+            third = await agent_module.run_agent_with_history("latest news", "gemini", history, search_mode="web")
+        finally:
+            agent_module.clear_answer_cache()
+
+        assert (first["answer"], first["cache_hit"]) == ("answer 1", False)
+        assert (second["answer"], second["cache_hit"]) == ("answer 1", True)
+        assert (third["answer"], third["cache_hit"]) == ("answer 2", False)
+        assert len(calls) == 2
+
+    def test_fallback_replies_not_generated(self):
+        """The client's fallback text is never treated as a model answer."""
+        client = LLMClient()
+        client.genai_client = object()
+
+        assert client.is_generated("A real answer")
+        assert not client.is_generated(client._fallback_response("anything"))
+        assert not client.is_generated("No response generated")
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
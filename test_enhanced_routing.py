@@ -6,6 +6,7 @@ import pytest
 import sys
 import os
 import asyncio
+from datetime import datetime
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -19,7 +20,7 @@ from agent.router import (
 )
 from agent.tool_chain import tool_chain, ChainStep
 from agent.tools import TOOLS, get_all_tool_performance_stats, reset_tool_metrics
-from agent.agent import run_agent_with_history
+from agent.agent import run_agent_with_history, stream_agent_with_history
 
 
 class TestEnhancedRouter:
@@ -49,6 +50,11 @@ class TestEnhancedRouter:
         # Memory-related query
         analysis = _analyze_message_context("remember what I said about my birthday")
         assert analysis["memory_intent"] is True
+
+        # Keywords match whole words, not fragments of longer ones
+        analysis = _analyze_message_context("show this chart")
+        assert analysis["conversational"] is False
+        assert analysis["memory_intent"] is False
     
     def test_enhanced_fallback_routing(self):
         """Test enhanced fallback routing with context analysis."""
@@ -80,10 +86,214 @@ class TestEnhancedRouter:
         assert metrics["tool_usage"]["web"] == 1
         assert metrics["routing_methods"]["llm"] == 1
 
+        # Snapshots are independent of later updates, and any tool is counted
+        _log_routing_decision("test message", "hybrid", analysis, "cache")
+        assert metrics["total_routes"] == 1
+        assert get_routing_metrics()["tool_usage"]["hybrid"] == 1
+
+    @pytest.mark.asyncio
+    async def test_routing_cache_reuses_decisions(self, monkeypatch):
+        """Repeated and near-identical messages skip the routing LLM call."""
+        from agent import router
+
+        router.clear_routing_cache()
+        calls = []
+
+        async def fake_generate(prompt, model="gemini", cache=False, **kwargs):
+            calls.append(prompt)
+            return "web"
+
+        monkeypatch.setattr(router.llm_client, "generate_response", fake_generate)
+
+        assert await select_tool("What is the latest Python release?") == "web"
+        assert await select_tool("what is the latest  python release?") == "web"
+        assert await select_tool("What is the latest Python release") == "web"
+        assert len(calls) == 1
+
+        # The same message in a different conversation is routed afresh
+        assert await select_tool("What is the latest Python release?", "user: hi") == "web"
+        assert len(calls) == 2
+        assert get_routing_metrics()["routing_methods"]["cache"] == 2
+        router.clear_routing_cache()
+
+    def test_near_duplicate_scan_bounded(self):
+        """Only recently used decisions are searched for near-duplicates."""
+        from agent import router
+
+        router.clear_routing_cache()
+        try:
+            message = "what is the latest python release?"
+            router._cache_route((message, ""), router._trigrams(message), "web")
+            near = "what is the latest python release"
+            assert router._cached_route((near, ""), router._trigrams(near)) == "web"
+
+            for i in range(router._ROUTING_SIMILARITY_SCAN):
+                other = f"unrelated question number {i}"
+                router._cache_route((other, ""), router._trigrams(other), "idle")
+
+            assert router._cached_route((near, ""), router._trigrams(near)) is None
+            assert router._cached_route((message, ""), router._trigrams(message)) == "web"
+        finally:
+            router.clear_routing_cache()
+
+    @pytest.mark.asyncio
+    async def test_small_talk_routed_locally(self, monkeypatch):
+        """Small talk, memory commands and AgentKit questions skip the LLM."""
+        from agent import router
+
+        async def fail_generate(*args, **kwargs):
+            raise AssertionError("LLM should not be called")
+
+        monkeypatch.setattr(router.llm_client, "generate_response", fail_generate)
+
+        assert await select_tool("Hi there!") == "idle"
+        assert await select_tool("thanks so much") == "idle"
+        assert router._local_route("show this file") is None
+        assert router._local_route("hi, what's the weather?") is None
+        assert await select_tool("Remember that my favourite colour is green") == "memory"
+        assert await select_tool("How is the AgentKit architecture organised?") == "rag"
+        assert router._local_route("how would you store passwords safely") is None
+
+        assert router._try_fast_route("hello again") == "idle"
+        assert router._try_fast_route("how would you store passwords safely") is None
+
+        metrics = get_routing_metrics()
+        assert metrics["routing_methods"]["local"] == 5
+        assert metrics["local_route_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_routing_store_survives_restart(self, monkeypatch, tmp_path):
+        """Decisions and metrics persisted to the store are restored on reopen."""
+        from agent import router
+
+        router.clear_routing_cache()
+
+        async def fake_generate(prompt, model="gemini", cache=False, **kwargs):
+            return "web"
+
+        monkeypatch.setattr(router.llm_client, "generate_response", fake_generate)
+        store_path = tmp_path / "routing.db"
+        try:
+            # Route with the context the agent builds for an opening message
+            context = router.build_routing_context(router.NO_PRIOR_CONVERSATION)
+            router.open_routing_store(store_path)
+            assert router._cached_route(("what's the latest news", context), router._trigrams("what's the latest news")) == "web"
+            assert await select_tool("Who won the Tour de France this year?", context) == "web"
+            # Decisions are buffered rather than written on the event loop
+            assert router._routing_store.execute(
+                "SELECT COUNT(*) FROM routes WHERE message LIKE 'who won%'"
+            ).fetchone()[0] == 0
+            router.close_routing_store()
+
+            router._routing_cache.clear()
+            reset_routing_metrics()
+            router.open_routing_store(store_path)
+            key = ("who won the tour de france this year?", context)
+            assert router._cached_route(key, router._trigrams(key[0])) == "web"
+            assert get_routing_metrics()["routing_methods"]["llm"] == 1
+        finally:
+            router.close_routing_store()
+            router.clear_routing_cache()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_routing_batched(self, monkeypatch):
+        """Concurrent routing prompts share one LLM call."""
+        from agent import router
+
+        router.clear_routing_cache()
+        prompts = []
+
+        async def fake_generate(prompt, model="gemini", cache=False, **kwargs):
+            prompts.append(prompt)
+            return "1. web\n2. memory"
+
+        monkeypatch.setattr(router.llm_client, "generate_response", fake_generate)
+
+        tools = await asyncio.gather(
+            select_tool("latest news about the Mars rover landing"),
+            select_tool("what did I tell you about my holiday plans"),
+        )
+        assert tools == ["web", "memory"]
+        assert len(prompts) == 1
+
 
 class TestToolChaining:
     """Test tool chaining capabilities."""
     
+    @pytest.mark.asyncio
+    async def test_chain_rag_runs_through_tool(self, monkeypatch):
+        """Chain steps look tools up at call time and pass RAG its namespace."""
+        from agent.tools import Tool
+
+        async def fake_retrieve(query, namespace="default", k=5):
+            if query == "broken":
+                raise RuntimeError("index offline")
+            return f"{namespace}:{query}"
+
+        rag = Tool(name="rag", description="fake rag", fn=fake_retrieve)
+        monkeypatch.setitem(TOOLS, "rag", rag)
+
+        assert await tool_chain._run_tool("rag", "setup", "docs") == "docs:setup"
+        assert await tool_chain._run_tool("rag", "setup", "other") == "other:setup"
+        assert await tool_chain._run_tool("rag", "broken", "docs") == "Tool rag failed: index offline"
+        assert (rag.success_count, rag.error_count) == (2, 1)
+
+    @pytest.mark.asyncio
+    async def test_chain_detection_cached(self, monkeypatch):
+        """Chain detection skips the LLM for cue-less and repeated messages."""
+        from agent import tool_chain as tool_chain_module
+
+        tool_chain.clear_detection_cache()
+        calls = []
+
+        async def fake_generate(prompt, model="gemini", cache=False, **kwargs):
+            calls.append(kwargs)
+            return "SINGLE"
+
+        monkeypatch.setattr(tool_chain_module.llm_client, "generate_response", fake_generate)
+
+        assert await tool_chain.detect_chain_opportunity("Compare Merkle trees and tries") is None
+        assert await tool_chain.detect_chain_opportunity("compare merkle  trees and tries") is None
+        assert len(calls) == 1
+        assert calls[0]["temperature"] == 0.0
+
+        # Messages without a chaining cue never reach the LLM
+        assert await tool_chain.detect_chain_opportunity("What is a Merkle tree?") is None
+        assert len(calls) == 1
+        tool_chain.clear_detection_cache()
+
+    def test_parse_chain_response(self):
+        """Chains need both the tools in the response and explicit intent in the message."""
+        steps = tool_chain._parse_chain_response("SEQUENTIAL: web, memory", "Find this price and remember it")
+        assert [step.tool_name for step in steps] == ["web", "memory"]
+
+        steps = tool_chain._parse_chain_response(
+            "memory then web", "Based on my project notes, find related tools"
+        )
+        assert [step.tool_name for step in steps] == ["memory", "web"]
+
+        assert tool_chain._parse_chain_response("SINGLE", "compare both") is None
+        assert tool_chain._parse_chain_response("web, memory", "Find the price") is None
+        assert tool_chain._parse_chain_response("web, memory", "hi, find it and remember it") is None
+
+    def test_chain_rules(self):
+        """Each chain rule applies in order, gated by its intent."""
+        def chain(response, message):
+            steps = tool_chain._parse_chain_response(response, message)
+            return steps and [step.tool_name for step in steps]
+
+        # Remember wins over recall when a message states both intents
+        assert chain("web, memory", "Recall my notes and remember the new price") == ["web", "memory"]
+        # Recall is reachable even though it names the same tools as remember
+        assert chain("web, memory", "Recall what I said earlier and search for updates") == ["memory", "web"]
+        # Compare applies whenever rag and web are named, memory or not
+        assert chain("rag, web", "Compare my notes with the latest docs") == ["rag", "web"]
+        assert chain("rag, web, memory", "Compare my notes with the latest docs") == ["rag", "web"]
+        assert chain("rag, web", "Find the latest docs") is None
+        # Greetings are whole words, so "which" and "this" don't block a chain
+        assert chain("rag, web", "Which is better, this or the docs? Compare them") == ["rag", "web"]
+        assert chain("rag, web", "Hi! compare them") is None
+
     @pytest.mark.asyncio
     async def test_chain_detection(self):
         """Test chain opportunity detection."""
@@ -110,6 +320,59 @@ class TestToolChaining:
         assert len(result.execution_order) > 0
         assert result.total_time > 0
         
+    @pytest.mark.asyncio
+    async def test_chain_runs_independent_steps(self):
+        """Steps without dependencies run in the same wave."""
+        steps = [
+            ChainStep(tool_name="memory", query="remember this"),
+            ChainStep(tool_name="idle", query="hello"),
+            ChainStep(tool_name="web", query="test query", depends_on=["memory", "idle"])
+        ]
+        
+        result = await tool_chain.execute_chain(steps)
+        
+        assert result.success is True
+        assert set(result.execution_order[:2]) == {"memory", "idle"}
+        assert result.execution_order[-1] == "web"
+    
+    @pytest.mark.asyncio
+    async def test_chain_steps_start_when_dependencies_finish(self, monkeypatch):
+        """A step starts as soon as its own dependencies are done, and cycles run in order."""
+        delays = {"web": 0.05, "memory": 0.0, "idle": 0.0}
+
+        async def fake_run_tool(tool_name, query, namespace):
+            await asyncio.sleep(delays[tool_name])
+            return f"{tool_name} done"
+
+        monkeypatch.setattr(tool_chain, "_run_tool", fake_run_tool)
+
+        steps = [
+            ChainStep(tool_name="web", query="slow"),
+            ChainStep(tool_name="memory", query="fast"),
+            ChainStep(tool_name="idle", query="after memory", depends_on=["memory"]),
+        ]
+        result = await tool_chain.execute_chain(steps)
+        assert result.success is True
+        assert result.execution_order == ["memory", "idle", "web"]
+
+        cyclic = [
+            ChainStep(tool_name="web", query="a", depends_on=["memory"]),
+            ChainStep(tool_name="memory", query="b", depends_on=["web"]),
+        ]
+        result = await tool_chain.execute_chain(cyclic)
+        assert result.success is True
+        assert result.execution_order == ["web", "memory"]
+
+    @pytest.mark.asyncio
+    async def test_chain_missing_dependency(self):
+        """Unsatisfiable dependencies fail the chain instead of hanging."""
+        steps = [ChainStep(tool_name="memory", query="recall", depends_on=["web"])]
+        
+        result = await tool_chain.execute_chain(steps)
+        
+        assert result.success is False
+        assert "Missing dependencies" in result.error
+        
     @pytest.mark.asyncio
     async def test_parallel_tool_execution(self):
         """Test parallel tool execution."""
@@ -125,6 +388,50 @@ class TestToolChaining:
         assert isinstance(results["web"], str)
         assert isinstance(results["memory"], str)
 
+    @pytest.mark.asyncio
+    async def test_parallel_tools_race(self, monkeypatch):
+        """Race mode returns the first success and cancels the slower tools."""
+        cancelled = []
+
+        async def fake_run_tool(tool_name, query, namespace, raise_errors=False):
+            if tool_name == "rag":
+                raise RuntimeError("index offline")
+            if tool_name == "web":
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(tool_name)
+                    raise
+            return f"{tool_name} answer"
+
+        monkeypatch.setattr(tool_chain, "_run_tool", fake_run_tool)
+
+        results = await tool_chain.execute_parallel_tools(
+            {"web": "q", "rag": "q", "memory": "q"}, race=True
+        )
+        assert results == {"memory": "memory answer"}
+        assert cancelled == ["web"]
+
+    @pytest.mark.asyncio
+    async def test_parallel_tools_race_skips_failed_tool(self, monkeypatch):
+        """A tool that fails first doesn't win the race with its error message."""
+        from agent.tools import Tool
+
+        async def failing_memory(query):
+            raise RuntimeError("store offline")
+
+        async def slow_web(query):
+            await asyncio.sleep(0.05)
+            return "web answer"
+
+        memory = Tool(name="memory", description="fake memory", fn=failing_memory)
+        monkeypatch.setitem(TOOLS, "memory", memory)
+        monkeypatch.setitem(TOOLS, "web", Tool(name="web", description="fake web", fn=slow_web))
+
+        results = await tool_chain.execute_parallel_tools({"web": "q", "memory": "q"}, race=True)
+        assert results == {"web": "web answer"}
+        assert memory.error_count == 1
+
 
 class TestPerformanceMonitoring:
     """Test tool performance monitoring."""
@@ -146,6 +453,26 @@ class TestPerformanceMonitoring:
         assert stats["name"] == "idle"
         assert "average_response_time" in stats
         assert stats["last_used"] is not None
+
+    @pytest.mark.asyncio
+    async def test_raw_performance_stats(self):
+        """Raw stats report the counters unformatted, and reset zeroes them."""
+        tool = TOOLS["idle"]
+        await tool.run("test query")
+        await tool.run("test query")
+
+        raw = tool.get_performance_stats_raw()
+        assert raw["total_calls"] == 2
+        assert raw["success_count"] == 2
+        assert raw["error_count"] == 0
+        assert isinstance(raw["total_time"], float)
+        assert isinstance(raw["last_used"], float)
+        assert datetime.fromisoformat(tool.get_performance_stats()["last_used"])
+        assert tool.metrics["average_response_time"] == raw["total_time"] / 2
+
+        reset_tool_metrics()
+        assert tool.get_performance_stats_raw()["total_calls"] == 0
+        assert tool.get_performance_stats_raw()["last_used"] is None
     
     def test_all_tool_stats(self):
         """Test getting all tool performance stats."""
@@ -180,6 +507,25 @@ class TestIntegratedWorkflows:
         # Should not use chaining for simple queries
         assert result["chain_execution"] is False
     
+    @pytest.mark.asyncio
+    async def test_agent_streaming(self):
+        """Streaming yields answer chunks followed by the full result."""
+        events = [
+            event async for event in stream_agent_with_history(
+                message="hello",
+                model="gemini",
+                conversation_history=[]
+            )
+        ]
+        
+        chunks = [event["content"] for event in events if event["type"] == "chunk"]
+        done = events[-1]
+        assert chunks
+        assert done["type"] == "done"
+        assert done["answer"] == "".join(chunks)
+        assert "tool_used" in done
+        assert "execution_time" in done
+    
     @pytest.mark.asyncio
     async def test_agent_error_handling(self):
         """Test agent error handling and fallbacks."""
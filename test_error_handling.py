@@ -44,6 +44,23 @@ class TestFileValidation:
         assert data["error"]["code"] == ErrorCodes.FILE_TOO_LARGE
         assert "50" in data["error"]["message"].lower() or "mb" in data["error"]["message"].lower()
 
+    def test_ingest_rejects_oversized_stream(self):
+        """Test that document ingestion stops reading once the size limit is passed."""
+        large_content = b"x" * (MAX_FILE_SIZE + 1)
+
+        response = client.post(
+            "/docs/ingest",
+            data={
+                "namespace": "test",
+                "session_id": "test-session",
+            },
+            files={"file": ("large_file.txt", large_content, "text/plain")},
+        )
+
+        assert response.status_code == 413
+        data = response.json()
+        assert data["error"]["code"] == ErrorCodes.FILE_TOO_LARGE
+
     def test_validate_unsupported_file_type(self):
         """Test that unsupported file types are rejected."""
         unsupported_content = b"fake executable content"
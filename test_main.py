@@ -3,10 +3,12 @@ Basic tests for AgentKit backend functionality.
 Run with: python -m pytest
 """
 
+import io
 import pytest
 import os
 import sys
 from unittest.mock import patch, AsyncMock
+from pathlib import Path
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -119,5 +121,79 @@ class TestFileUpload:
         assert response.status_code == 413  # File too large
 
 
+class TestFileManager:
+    """Test file storage and the metadata index."""
+
+    @pytest.mark.asyncio
+    async def test_index_tracks_stored_files(self, tmp_path):
+        """Listing, stats, and deletion are served from the index."""
+        from agent.file_manager import FileManager
+
+        manager = FileManager(str(tmp_path))
+        first = await manager.store_file(b"hello", "a.txt", "text/plain", user_id="u1")
+        await manager.store_file(b"world!", "b.txt", "text/plain", user_id="u2")
+
+        assert [f["file_id"] for f in manager.list_user_files("u1")] == [first["file_id"]]
+        assert manager.get_file_metadata(first["file_id"]) == first
+        assert manager.get_file_content(first["file_id"]) == b"hello"
+        assert await manager.get_file_content_async(first["file_id"]) == b"hello"
+        assert manager.get_storage_stats()["total_size_bytes"] == 11
+
+        # Existing JSON metadata is picked up by a fresh index
+        (tmp_path / "index.db").unlink()
+        manager = FileManager(str(tmp_path))
+        assert len(manager.list_user_files()) == 2
+
+        assert manager.delete_file(first["file_id"])
+        assert manager.get_storage_stats()["total_files"] == 1
+        assert manager.cleanup_old_files(days_old=-1) == 1
+        assert manager.list_user_files() == []
+
+    @pytest.mark.asyncio
+    async def test_spooled_upload_moved_into_storage(self, tmp_path):
+        """A spooled upload path is moved into storage and processed from disk."""
+        from agent.document_processor import DocumentProcessor
+        from agent.file_manager import FileManager
+
+        spooled = tmp_path / "upload.tmp"
+        spooled.write_bytes(b"hello from disk")
+
+        manager = FileManager(str(tmp_path / "store"))
+        metadata = await manager.store_file(spooled, "a.txt", "text/plain")
+
+        assert not spooled.exists()
+        assert metadata["file_size"] == 15
+        result = await DocumentProcessor.process_file(
+            Path(metadata["file_path"]), "a.txt", "text/plain"
+        )
+        assert result["text_content"] == "hello from disk"
+        assert result["size"] == 15
+        assert result["word_count"] == 3
+
+
+
+class TestDocumentProcessor:
+    """Test text extraction from uploaded documents."""
+
+    def test_pdfium_failure_falls_back_to_pypdf2(self, monkeypatch):
+        """A PDF that PDFium rejects is parsed with PyPDF2 instead."""
+        pdfium = pytest.importorskip("pypdfium2")
+        PyPDF2 = pytest.importorskip("PyPDF2")
+        from agent.document_processor import DocumentProcessor
+
+        def reject(content):
+            raise pdfium.PdfiumError("cannot open")
+
+        monkeypatch.setattr(DocumentProcessor, "_pdfium_pages", staticmethod(reject))
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(width=72, height=72)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+
+        result = DocumentProcessor._extract_pdf(buffer.getvalue())
+        assert result["processing_success"]
+        assert result["page_count"] == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
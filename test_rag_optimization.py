@@ -223,6 +223,32 @@ def test_cache_clear():
     print("✅ Cache clearing working")
 
 
+def test_cache_invalidated_by_writes_and_ttl(monkeypatch):
+    """Cached results are dropped after a write to the namespace or once expired."""
+    from rag import store
+
+    clear_cache()
+    namespace = "cache_version_test"
+    hits = [{"id": "v1", "text": "old", "metadata": {}}]
+
+    key = store._get_cache_key(namespace, "versioned query", 5)
+    store._cache_result(key, hits)
+    assert store._get_cached_result(key) == hits
+
+    # A write moves the namespace to a new key; the old entry is never read again
+    store._bump_namespace_version(namespace)
+    assert store._get_cache_key(namespace, "versioned query", 5) != key
+
+    key = store._get_cache_key(namespace, "versioned query", 5)
+    store._cache_result(key, hits)
+    monkeypatch.setitem(store._config, "cache_ttl_seconds", -1)
+    store._cache_result(key, hits)
+    assert store._get_cached_result(key) is None
+
+    clear_cache()
+    print("✅ Cache invalidation working")
+
+
 def test_different_k_values():
     """Test queries with different k values."""
     namespace = "k_value_test"